@@ -1,12 +1,26 @@
-from flask import Flask, request, jsonify
+import os
+
+# Set LA_FIRES_DEV_SERVER=1 to use Flask's debug server (with auto-reload) instead of gevent
+DEV_SERVER = os.getenv("LA_FIRES_DEV_SERVER") == "1"
+
+if not DEV_SERVER:
+    # Patch blocking I/O before anything imports socket, ssl or requests so that
+    # Mapbox, ca.gov and Weaviate calls yield to other requests instead of blocking
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, Response, request, jsonify
 import logging
 from logging.handlers import RotatingFileHandler
-import os
-import requests
+import numpy as np
+import orjson
+import re
+from http_client import use_orjson_for_responses
 from progress_tracker_service import process_progress_data
 from shelter_service import get_shelter_service
 from deadlines_service import process_deadlines_data
 from missing_service import get_missing_service
+from geocoding_service import MAPBOX_ACCESS_TOKEN, geocode_address, geocode_batch
 
 # Configure logging
 if not os.path.exists('logs'):
@@ -32,63 +46,59 @@ console_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+# Report a missing Mapbox token at startup instead of on the first address lookup.
+# The server still starts: gazetteer lookups and the other endpoints don't need it.
+if not MAPBOX_ACCESS_TOKEN:
+    logger.error("MAPBOX_ACCESS_TOKEN environment variable not set; address geocoding is disabled")
+
 app = Flask(__name__)
 
+# Decode Weaviate and Mapbox responses with orjson rather than the stdlib json module
+use_orjson_for_responses()
+
+def ojsonify(obj) -> Response:
+    """
+    Serialize a response with orjson, which is much faster than jsonify for the
+    long lists of shelter dicts returned by the shelter endpoints. NumPy values
+    are serialized directly.
+    """
+    return Response(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY), mimetype="application/json")
+
+# Maximum number of addresses accepted by the batch shelter endpoint
+MAX_BATCH_ADDRESSES = 100
+
+# Whole-word city and state tokens, so e.g. "Lafayette" or "Cahuenga" don't count
+_CITY_RE = re.compile(r'\blos\s+angeles\b', re.IGNORECASE)
+# "LA" / "L.A." only counts as the city in capitals and as its own comma-separated
+# part (optionally followed by the state or ZIP), so "La Brea Ave" isn't mistaken for it
+_CITY_ABBREV_RE = re.compile(r'(?:^|,)\s*L\.?A\.?(?=\s*(?:$|,|\d{5}|(?i:ca|california)\b))')
+_STATE_RE = re.compile(r'\b(?:ca|california)\b', re.IGNORECASE)
+
 # Stay Healthy Endpoints
-def geocode_address(address: str):
+def normalize_la_address(address: str) -> str:
     """
-    Convert address to lat/lon coordinates using Mapbox Geocoding API
+    Add "Los Angeles" and/or "CA" to an address that doesn't mention them
     
     Args:
-        address: The address string to geocode
+        address: The address string entered by the user
         
     Returns:
-        Tuple of (latitude, longitude) or None if geocoding failed
+        The address with missing city/state information appended
     """
-    # Get Mapbox API key from environment
-    mapbox_token = os.getenv("MAPBOX_ACCESS_TOKEN")
-    if not mapbox_token:
-        logger.error("MAPBOX_ACCESS_TOKEN environment variable not set")
-        return None
-        
-    try:
-        # URL encode the address
-        encoded_address = requests.utils.quote(address)
-        
-        # Construct Mapbox Geocoding API URL
-        url = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{encoded_address}.json"
-        params = {
-            "access_token": mapbox_token,
-            "limit": 1,  # We only need the top result
-            "country": "US"  # Limit to US results
-        }
-        
-        # Make request to Mapbox
-        logger.info(f"Geocoding address: {address}")
-        response = requests.get(url, params=params)
-        
-        # Check response
-        if response.status_code != 200:
-            logger.error(f"Mapbox API error: {response.status_code} - {response.text}")
-            return None
-            
-        # Parse response
-        data = response.json()
-        
-        # Check if we got features back
-        if not data.get("features") or len(data["features"]) == 0:
-            logger.warning(f"No geocoding results found for address: {address}")
-            return None
-            
-        # Get coordinates [longitude, latitude]
-        coordinates = data["features"][0]["center"]
-        
-        # Return as (latitude, longitude) - note the order reversal from Mapbox's format
-        return (coordinates[1], coordinates[0])
-        
-    except Exception as e:
-        logger.error(f"Error geocoding address: {str(e)}")
-        return None
+    has_city = _CITY_RE.search(address) is not None or _CITY_ABBREV_RE.search(address) is not None
+    has_state = _STATE_RE.search(address) is not None
+    
+    if not has_city and not has_state:
+        # Neither city nor state found, add both
+        return f"{address}, Los Angeles, CA"
+    elif not has_city:
+        # State found but not city, add city
+        return f"{address}, Los Angeles"
+    elif not has_state:
+        # City found but not state, add state
+        return f"{address}, CA"
+    
+    return address
 
 @app.route('/api/stayhealthy/getshelter', methods=['GET'])
 def get_shelter():
@@ -130,7 +140,7 @@ def get_shelter():
                     logger.info(f"Limiting results to {limit} closest shelters")
                 
                 # Return results with coordinates
-                return jsonify({
+                return ojsonify({
                     "success": True, 
                     "coordinates": {"lat": lat, "lon": lon},
                     "search_radius_km": distance,
@@ -154,18 +164,7 @@ def get_shelter():
             }), 400
         
         # Add "Los Angeles, CA" if it doesn't contain city/state info
-        address_lower = address.lower()
-        if "los angeles" not in address_lower and "la" not in address_lower:
-            if "ca" not in address_lower and "california" not in address_lower:
-                # Neither city nor state found, add both
-                address = f"{address}, Los Angeles, CA"
-            else:
-                # State found but not city, add city
-                address = f"{address}, Los Angeles"
-        elif "ca" not in address_lower and "california" not in address_lower:
-            # City found but not state, add state
-            address = f"{address}, CA"
-            
+        address = normalize_la_address(address)
         logger.info(f"Normalized address: {address}")
         
         # Geocode the address
@@ -193,7 +192,7 @@ def get_shelter():
             logger.info(f"Limiting results to {limit} closest shelters")
         
         # Return results with original address and coordinates
-        return jsonify({
+        return ojsonify({
             "success": True, 
             "address": address,
             "coordinates": {"lat": lat, "lon": lon},
@@ -207,6 +206,81 @@ def get_shelter():
         logger.error(error_msg)
         return jsonify({"success": False, "error": error_msg}), 500
 
+@app.route('/api/stayhealthy/getshelter/batch', methods=['POST'])
+def get_shelter_batch():
+    logger.info("Endpoint hit: /api/stayhealthy/getshelter/batch")
+    
+    try:
+        data = request.get_json(silent=True)
+        addresses = data.get('addresses') if isinstance(data, dict) else None
+        
+        if not addresses or not isinstance(addresses, list) or not all(isinstance(a, str) and a.strip() for a in addresses):
+            return jsonify({
+                "success": False,
+                "error": "Request body must contain an 'addresses' list of non-empty strings"
+            }), 400
+        
+        if len(addresses) > MAX_BATCH_ADDRESSES:
+            return jsonify({
+                "success": False,
+                "error": f"At most {MAX_BATCH_ADDRESSES} addresses can be looked up per request"
+            }), 400
+        
+        # Get optional radius parameter (default 10km)
+        try:
+            distance = float(data.get('distance', 10.0))
+        except (TypeError, ValueError):
+            distance = 50.0
+            
+        # Get optional limit parameter (default 0 means no limit)
+        try:
+            limit = int(data.get('limit', 0))
+        except (TypeError, ValueError):
+            limit = 0
+        
+        # Geocode all addresses together, then look up shelters for each
+        normalized_addresses = [normalize_la_address(a) for a in addresses]
+        coordinates_list = geocode_batch(normalized_addresses)
+        
+        shelter_service = get_shelter_service()
+        
+        results = []
+        for address, coordinates in zip(normalized_addresses, coordinates_list):
+            if not coordinates:
+                results.append({
+                    "success": False,
+                    "address": address,
+                    "error": "Could not geocode the provided address"
+                })
+                continue
+            
+            lat, lon = coordinates
+            shelters = shelter_service.get_shelters_by_location(lat, lon, distance_km=distance)
+            
+            # Apply limit if specified
+            if limit > 0 and len(shelters) > limit:
+                shelters = shelters[:limit]
+            
+            results.append({
+                "success": True,
+                "address": address,
+                "coordinates": {"lat": lat, "lon": lon},
+                "shelters": shelters,
+                "shelter_count": len(shelters)
+            })
+        
+        return ojsonify({
+            "success": True,
+            "search_radius_km": distance,
+            "results": results,
+            "count": len(results)
+        })
+        
+    except Exception as e:
+        error_msg = f"Error retrieving shelter data: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({"success": False, "error": error_msg}), 500
+
 # Check Progress Endpoint
 @app.route('/api/checkprogress', methods=['GET'])
 def check_progress():
@@ -311,17 +385,17 @@ def debug_shelters():
         shelter_service = get_shelter_service()
         
         # Get all shelters
-        all_shelters = shelter_service.get_all_shelters()
+        shelters = shelter_service.get_shelter_table()
         
         # Return first 10 shelters with their coordinates
-        sample_shelters = all_shelters[:10]
+        sample_shelters = [shelters.row(i) for i in range(min(10, len(shelters)))]
         
         # Count shelters with valid coordinates
-        valid_coords = sum(1 for s in all_shelters if s.get('lat') != 0 and s.get('lon') != 0)
+        valid_coords = int(np.count_nonzero((shelters.lats != 0) & (shelters.lons != 0)))
         
-        return jsonify({
+        return ojsonify({
             "success": True,
-            "total_shelters": len(all_shelters),
+            "total_shelters": len(shelters),
             "shelters_with_valid_coords": valid_coords,
             "sample_shelters": sample_shelters,
             "csv_format": "address,bookinglink,phonenumber(in lat column),latitude(in lon column),longitude(in phonenumber column),notes"
@@ -353,31 +427,29 @@ def debug_nearest_shelters():
         # Initialize shelter service
         shelter_service = get_shelter_service()
         
-        # Get all shelters and calculate distances
-        all_shelters = shelter_service.get_all_shelters()
-        
-        # Calculate distance for each shelter
-        for shelter in all_shelters:
-            shelter_lat = shelter.get('lat')
-            shelter_lon = shelter.get('lon')
-            if shelter_lat is not None and shelter_lon is not None:
-                distance_km = shelter_service._haversine(test_lat, test_lon, shelter_lat, shelter_lon)
-                shelter['distance_km'] = round(distance_km, 2)
+        # Get all shelters and calculate distances in one vectorized pass
+        shelters = shelter_service.get_shelter_table()
+        distances = shelters.distances_from(test_lat, test_lon)
         
-        # Sort by distance
-        all_shelters.sort(key=lambda x: x.get('distance_km', float('inf')))
+        # Count shelters within the specified radius
+        nearby_count = int(np.count_nonzero(distances <= distance))
         
-        # Get shelters within the specified radius
-        nearby_shelters = [s for s in all_shelters if s.get('distance_km', float('inf')) <= distance]
+        # Return the closest 10 shelters, selecting them without sorting the full list
+        k = min(10, len(shelters))
+        closest_idx = np.argpartition(distances, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.intp)
+        closest_idx = closest_idx[np.argsort(distances[closest_idx])]
         
-        # Return the closest 10 shelters
-        closest_shelters = all_shelters[:10]
+        closest_shelters = []
+        for i in closest_idx:
+            shelter = shelters.row(i)
+            shelter['distance_km'] = round(float(distances[i]), 2)
+            closest_shelters.append(shelter)
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "coordinates": {"lat": test_lat, "lon": test_lon},
             "search_radius_km": distance,
-            "shelters_within_radius": len(nearby_shelters),
+            "shelters_within_radius": nearby_count,
             "closest_shelters": closest_shelters
         })
         
@@ -388,4 +460,8 @@ def debug_nearest_shelters():
 
 if __name__ == '__main__':
     logger.info("Starting LA Fires API server")
-    app.run(debug=True, port=6000) 
\ No newline at end of file
+    if DEV_SERVER:
+        app.run(debug=True, port=6000)
+    else:
+        from gevent.pywsgi import WSGIServer
+        WSGIServer(('0.0.0.0', 6000), app).serve_forever() 
\ No newline at end of file
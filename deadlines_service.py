@@ -1,54 +1,56 @@
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
 import datetime
 import re
+from functools import lru_cache
+import os
+from http_client import CachedPage
 
 # Set up logging for this module
 logger = logging.getLogger('la_fires_api.deadlines')
 
+# Patterns used to clean up descriptions and parse dates like "March 10, 2025"
+_FOR_FIX_RE = re.compile(r'for(\w)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_DATE_RE = re.compile(r'(\w+)\s+(\d+),\s+(\d{4})')
+
+# Deadline cards are "col-lg-3" divs holding an "h3.font-size-20" date heading
+_DATE_TEXT_XPATH = etree.XPath(
+    "string(.//h3[contains(concat(' ', normalize-space(@class), ' '), ' font-size-20 ')])"
+)
+_HAS_DATE_XPATH = etree.XPath(
+    "boolean(.//h3[contains(concat(' ', normalize-space(@class), ' '), ' font-size-20 ')])"
+)
+_LINK_ICON_TEXT_XPATH = etree.XPath(
+    "string(.//span[contains(concat(' ', normalize-space(@class), ' '), ' external-link-icon ')])"
+)
+
+# The page is served as UTF-8; decoding in the parser avoids building response.text
+PAGE_ENCODING = 'utf-8'
+
+_MONTHS = {"January": 1, "February": 2, "March": 3, "April": 4, "May": 5, "June": 6,
+           "July": 7, "August": 8, "September": 9, "October": 10, "November": 11, "December": 12}
+
+DEADLINES_URL = "https://www.ca.gov/lafires/"
+
+# The page changes at most daily, so serve the parsed result from memory for a while
+DEADLINES_CACHE_TTL = int(os.getenv("DEADLINES_CACHE_TTL", "600"))
+
+# Streamed so the page is parsed as it arrives rather than buffered whole
+_deadlines_page = CachedPage(DEADLINES_URL, ttl=DEADLINES_CACHE_TTL, stream=True)
+
 def get_deadlines_data() -> Dict[str, Any]:
     """
     Fetches and parses deadlines data from the LA Fires webpage.
+    The parsed result is cached for DEADLINES_CACHE_TTL seconds.
     
     Returns:
         Dict containing parsed deadlines with dates and descriptions
     """
-    url = "https://www.ca.gov/lafires/"
-    
     try:
-        # Step 1: Fetch the webpage content
-        logger.info(f"Fetching deadlines data from {url}")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        
-        # Step 2: Parse HTML with BeautifulSoup using lxml parser for speed
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # Step 3: Find all divs with class "col-lg-3" that contain deadline information
-        deadline_divs = soup.find_all('div', class_='col-lg-3')
-        
-        if not deadline_divs:
-            logger.warning("No deadline divs found on the webpage. Structure might have changed.")
-            return {"success": False, "error": "Unable to find deadline content on the webpage"}
-        
-        # Step 4: Extract deadline data from each div
-        deadlines = extract_deadlines(deadline_divs)
-        
-        # Sort deadlines by date
-        deadlines.sort(key=lambda x: x.get('date_obj', datetime.datetime.max))
-        
-        # Remove datetime objects used for sorting
-        for deadline in deadlines:
-            if 'date_obj' in deadline:
-                del deadline['date_obj']
-        
-        return {
-            "success": True,
-            "deadlines": deadlines,
-            "count": len(deadlines)
-        }
+        return _deadlines_page.get(parse_deadlines_page)
     
     except requests.RequestException as e:
         # Handle network errors
@@ -62,90 +64,153 @@ def get_deadlines_data() -> Dict[str, Any]:
         logger.error(error_msg)
         return {"success": False, "error": error_msg}
 
-def extract_deadlines(deadline_divs) -> List[Dict[str, Any]]:
+def parse_deadlines_page(response: requests.Response) -> Dict[str, Any]:
     """
-    Extract deadline information from the div elements
+    Parse the deadlines out of a streamed LA Fires webpage.
+    Deadline divs are extracted as soon as they are complete and then cleared,
+    so memory stays flat no matter how large the rest of the page is.
     
     Args:
-        deadline_divs: List of BeautifulSoup elements containing deadline info
+        response: The streamed HTTP response for the page
         
     Returns:
-        List of dictionaries containing structured deadline data
+        Dict containing parsed deadlines with dates and descriptions
     """
     deadlines = []
+    found = False
     
-    for div in deadline_divs:
-        try:
-            # Extract the date from h3 element
-            date_elem = div.find('h3', class_='font-size-20')
-            if not date_elem:
-                continue
-                
-            date_text = date_elem.get_text().strip()
-            
-            # Extract the description from p element
-            desc_elem = div.find('p')
-            if not desc_elem:
-                continue
-                
-            # Extract text and handle any contained links
-            description = ""
-            link_url = None
-            
-            for content in desc_elem.contents:
-                if isinstance(content, str):
-                    description += content.strip() + " "
-                elif content.name == 'a':
-                    # Include link text but not the external link icon
-                    link_text = content.get_text().strip()
-                    # Store the link URL
-                    link_url = content.get('href')
-                    # Remove span with external-link-icon if present
-                    span = content.find('span', class_='external-link-icon')
-                    if span:
-                        link_text = link_text.replace(span.get_text(), '').strip()
-                    description += link_text + " "
-            
-            description = description.strip()
-            
-            # Fix common formatting issues
-            description = re.sub(r'for(\w)', r'for \1', description)  # Add space after "for" if missing
-            description = re.sub(r'\s+', ' ', description)  # Normalize spaces
-            
-            # Try to parse the date to enable sorting
-            date_obj = None
-            try:
-                # Extract month, day, year from date string like "March 10, 2025"
-                date_match = re.search(r'(\w+)\s+(\d+),\s+(\d{4})', date_text)
-                if date_match:
-                    month, day, year = date_match.groups()
-                    month_num = {"January": 1, "February": 2, "March": 3, "April": 4, "May": 5, "June": 6,
-                                "July": 7, "August": 8, "September": 9, "October": 10, "November": 11, "December": 12}.get(month)
-                    if month_num:
-                        date_obj = datetime.datetime(int(year), month_num, int(day))
-            except Exception as e:
-                logger.warning(f"Error parsing date '{date_text}': {str(e)}")
-            
-            deadline = {
-                "date": date_text,
-                "description": description
-            }
-            
-            # Add date object for sorting (will be removed later)
-            if date_obj:
-                deadline["date_obj"] = date_obj
-            
-            # Add link URL if available
-            if link_url:
-                deadline["link"] = link_url
-            
+    # Let urllib3 undo any gzip/deflate content encoding while lxml reads
+    response.raw.decode_content = True
+    
+    context = etree.iterparse(response.raw, events=("end",), tag="div", html=True, encoding=PAGE_ENCODING)
+    for _, div in context:
+        if not _is_deadline_div(div):
+            # Leave other divs alone; they may be inside a deadline card that isn't finished yet
+            continue
+        
+        found = True
+        deadline = extract_deadline(div)
+        if deadline:
             deadlines.append(deadline)
+        
+        # Drop the processed card and anything before it in the same parent
+        div.clear()
+        while div.getprevious() is not None:
+            del div.getparent()[0]
+    
+    if not found:
+        logger.warning("No deadline divs found on the webpage. Structure might have changed.")
+        return {"success": False, "error": "Unable to find deadline content on the webpage"}
+    
+    # Sort deadlines by date
+    deadlines.sort(key=lambda x: x.get('date_obj', datetime.datetime.max))
+    
+    # Remove datetime objects used for sorting
+    for deadline in deadlines:
+        if 'date_obj' in deadline:
+            del deadline['date_obj']
+    
+    return {
+        "success": True,
+        "deadlines": deadlines,
+        "count": len(deadlines)
+    }
+
+def _is_deadline_div(div) -> bool:
+    return "col-lg-3" in (div.get("class") or "").split() and _HAS_DATE_XPATH(div)
+
+def extract_deadline(div) -> Optional[Dict[str, Any]]:
+    """
+    Extract deadline information from a single deadline div
+    
+    Args:
+        div: lxml element containing deadline info
+        
+    Returns:
+        Dictionary containing structured deadline data, or None if the div has no description
+    """
+    try:
+        # Extract the date from h3 element
+        date_text = _DATE_TEXT_XPATH(div).strip()
+        
+        # Extract the description from p element
+        desc_elem = div.find('.//p')
+        if desc_elem is None:
+            return None
             
-        except Exception as e:
-            logger.warning(f"Error extracting deadline data: {str(e)}")
-            continue
+        # Extract text and handle any contained links
+        description = ""
+        link_url = None
+        
+        if desc_elem.text:
+            description += desc_elem.text.strip() + " "
+        
+        for child in desc_elem:
+            if child.tag == 'a':
+                # Include link text but not the external link icon
+                link_text = "".join(child.itertext()).strip()
+                # Store the link URL
+                link_url = child.get('href')
+                # Remove span with external-link-icon if present
+                icon_text = _LINK_ICON_TEXT_XPATH(child)
+                if icon_text:
+                    link_text = link_text.replace(icon_text, '').strip()
+                description += link_text + " "
+            
+            # Text following a child element belongs to the paragraph itself
+            if child.tail:
+                description += child.tail.strip() + " "
+        
+        description = description.strip()
+        
+        # Fix common formatting issues
+        description = _FOR_FIX_RE.sub(r'for \1', description)  # Add space after "for" if missing
+        description = _WHITESPACE_RE.sub(' ', description)  # Normalize spaces
+        
+        # Try to parse the date to enable sorting
+        date_obj = _parse_date(date_text)
+        
+        deadline = {
+            "date": date_text,
+            "description": description
+        }
+        
+        # Add date object for sorting (will be removed later)
+        if date_obj:
+            deadline["date_obj"] = date_obj
+        
+        # Add link URL if available
+        if link_url:
+            deadline["link"] = link_url
+        
+        return deadline
+        
+    except Exception as e:
+        logger.warning(f"Error extracting deadline data: {str(e)}")
+        return None
+
+@lru_cache(maxsize=256)
+def _parse_date(date_text: str) -> Optional[datetime.datetime]:
+    """
+    Parse a date string like "March 10, 2025" into a datetime for sorting
+    
+    Args:
+        date_text: The date text from the deadline heading
+        
+    Returns:
+        datetime object or None if the date could not be parsed
+    """
+    try:
+        date_match = _DATE_RE.search(date_text)
+        if date_match:
+            month, day, year = date_match.groups()
+            month_num = _MONTHS.get(month)
+            if month_num:
+                return datetime.datetime(int(year), month_num, int(day))
+    except Exception as e:
+        logger.warning(f"Error parsing date '{date_text}': {str(e)}")
     
-    return deadlines
+    return None
 
 def process_deadlines_data() -> Dict[str, Any]:
     """
@@ -0,0 +1,382 @@
+import requests
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from gevent.pool import Pool
+from http_client import get_session
+
+# Set up logging for this module
+logger = logging.getLogger('la_fires_api.geocoding')
+
+# Cache settings
+GEOCODING_CACHE_DIR = os.getenv("GEOCODING_CACHE_DIR", "geocoding_cache")
+GEOCODING_CACHE_MAX_ENTRIES = 4096
+GEOCODING_CACHE_TTL = 30 * 24 * 3600  # Geocodes for an address rarely change
+GEOCODING_NEGATIVE_CACHE_TTL = 3600  # Retry unknown addresses sooner
+
+# Read once at import; app.py reports a missing token at startup
+MAPBOX_ACCESS_TOKEN = os.getenv("MAPBOX_ACCESS_TOKEN")
+
+# Mapbox accepts up to 50 queries per batch geocoding request
+MAPBOX_BATCH_SIZE = 50
+
+# Single-address requests in flight at once when batch geocoding isn't available
+MAPBOX_GEOCODE_CONCURRENCY = 8
+
+# Cleared the first time Mapbox refuses the batch endpoint for this token (401/403),
+# so later batches go straight to single-address geocoding
+_batch_geocoding_available = True
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+Coordinates = Tuple[float, float]
+
+# Precomputed coordinates for common LA-area neighborhood names and ZIP codes
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'la_gazetteer.json')
+
+# Trailing address parts that only say "Los Angeles" and are ignored for gazetteer lookups
+_GAZETTEER_CONTEXT = frozenset({"los angeles", "la", "l.a.", "ca", "california", "los angeles ca", "usa", "us"})
+
+def _load_gazetteer(path: str) -> Dict[str, Coordinates]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {name: (coords[0], coords[1]) for name, coords in json.load(f).items()}
+    except (OSError, ValueError) as e:
+        logger.warning(f"LA gazetteer not loaded: {str(e)}")
+        return {}
+
+_la_gazetteer = _load_gazetteer(GAZETTEER_FILE)
+
+def normalize_address(address: str) -> str:
+    """
+    Normalize an address for use as a cache key, so "123 Main St" and
+    "123  main st" share an entry
+    """
+    return _WHITESPACE_RE.sub(' ', address).strip().lower()
+
+def lookup_gazetteer(address: str) -> Optional[Coordinates]:
+    """
+    Look up a bare neighborhood name or ZIP code (e.g. "Altadena", "90046, Los Angeles, CA")
+    in the local LA gazetteer
+    
+    Args:
+        address: The address string to look up
+        
+    Returns:
+        Tuple of (latitude, longitude) or None if the address isn't a known place
+    """
+    parts = [part.strip() for part in normalize_address(address).split(',')]
+    while len(parts) > 1 and parts[-1] in _GAZETTEER_CONTEXT:
+        parts.pop()
+    
+    return _la_gazetteer.get(', '.join(parts))
+
+class GeocodeCache:
+    """Bounded in-memory LRU cache with TTL, backed by an on-disk SQLite layer"""
+
+    def __init__(self, cache_dir: Optional[str], max_entries: int, ttl: float, negative_ttl: float):
+        """
+        Initialize the geocode cache
+
+        Args:
+            cache_dir: Directory for the persistent cache, or None to keep it in memory only
+            max_entries: Maximum number of entries held in memory
+            ttl: Seconds to keep a successful result
+            negative_ttl: Seconds to keep a "no result" (None) entry
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, coordinates)
+        self._lock = threading.Lock()
+        self._db_path = None
+
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                self._db_path = os.path.join(cache_dir, 'geocode.sqlite3')
+                with self._connect() as conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS geocodes ("
+                        "key TEXT PRIMARY KEY, lat REAL, lon REAL, expires_at REAL NOT NULL)"
+                    )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Disk geocoding cache disabled: {str(e)}")
+                self._db_path = None
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._db_path, timeout=5)
+
+    def get(self, key: str) -> Tuple[bool, Optional[Coordinates]]:
+        """
+        Look up a normalized address
+
+        Returns:
+            Tuple of (hit, coordinates); coordinates may be None for a cached negative result
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, coordinates = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return True, coordinates
+                del self._entries[key]
+
+        if not self._db_path:
+            return False, None
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT lat, lon, expires_at FROM geocodes WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading geocoding cache: {str(e)}")
+            return False, None
+
+        if row is None or row[2] <= now:
+            return False, None
+
+        coordinates = (row[0], row[1]) if row[0] is not None else None
+        self._remember(key, row[2], coordinates)
+        return True, coordinates
+
+    def set(self, key: str, coordinates: Optional[Coordinates]) -> None:
+        """Store a geocoding result (or None for an address with no result)"""
+        expires_at = time.time() + (self.ttl if coordinates is not None else self.negative_ttl)
+        self._remember(key, expires_at, coordinates)
+
+        if not self._db_path:
+            return
+
+        lat, lon = coordinates if coordinates is not None else (None, None)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocodes (key, lat, lon, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, lat, lon, expires_at)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Error writing geocoding cache: {str(e)}")
+
+    def _remember(self, key: str, expires_at: float, coordinates: Optional[Coordinates]) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, coordinates)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+_geocode_cache = GeocodeCache(
+    GEOCODING_CACHE_DIR,
+    GEOCODING_CACHE_MAX_ENTRIES,
+    GEOCODING_CACHE_TTL,
+    GEOCODING_NEGATIVE_CACHE_TTL
+)
+
+def geocode_address(address: str) -> Optional[Coordinates]:
+    """
+    Convert address to lat/lon coordinates using Mapbox Geocoding API.
+    Known LA neighborhoods and ZIP codes are answered from the local gazetteer,
+    and Mapbox results are cached by normalized address, in memory and on disk.
+
+    Args:
+        address: The address string to geocode
+
+    Returns:
+        Tuple of (latitude, longitude) or None if geocoding failed
+    """
+    coordinates = lookup_gazetteer(address)
+    if coordinates:
+        logger.info(f"Found address in LA gazetteer: {address}")
+        return coordinates
+    
+    key = normalize_address(address)
+    hit, coordinates = _geocode_cache.get(key)
+    if hit:
+        logger.info(f"Geocoding cache hit for address: {address}")
+        return coordinates
+
+    if not MAPBOX_ACCESS_TOKEN:
+        logger.error("MAPBOX_ACCESS_TOKEN environment variable not set")
+        return None
+
+    try:
+        # URL encode the address
+        encoded_address = requests.utils.quote(address)
+
+        # Construct Mapbox Geocoding API URL
+        url = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{encoded_address}.json"
+        params = {
+            "access_token": MAPBOX_ACCESS_TOKEN,
+            "limit": 1,  # We only need the top result
+            "country": "US"  # Limit to US results
+        }
+
+        # Make request to Mapbox
+        logger.info(f"Geocoding address: {address}")
+        response = get_session().get(url, params=params, timeout=5)
+
+        # Check response - API errors are not cached since they are usually transient
+        if response.status_code != 200:
+            logger.error(f"Mapbox API error: {response.status_code} - {response.text}")
+            return None
+
+        # Parse response
+        data = response.json()
+
+        # Check if we got features back
+        if not data.get("features") or len(data["features"]) == 0:
+            logger.warning(f"No geocoding results found for address: {address}")
+            _geocode_cache.set(key, None)
+            return None
+
+        # Get coordinates [longitude, latitude]
+        coordinates = data["features"][0]["center"]
+
+        # Return as (latitude, longitude) - note the order reversal from Mapbox's format
+        result = (coordinates[1], coordinates[0])
+        _geocode_cache.set(key, result)
+        return result
+
+    except Exception as e:
+        logger.error(f"Error geocoding address: {str(e)}")
+        return None
+
+def geocode_batch(addresses: List[str]) -> List[Optional[Coordinates]]:
+    """
+    Convert several addresses to lat/lon coordinates. Gazetteer and cached
+    addresses are answered locally; the rest are sent to Mapbox's batch geocoding
+    endpoint in groups of up to MAPBOX_BATCH_SIZE.
+    
+    Args:
+        addresses: The address strings to geocode
+        
+    Returns:
+        List of (latitude, longitude) tuples or None, in the same order as addresses
+    """
+    results = [None] * len(addresses)
+    
+    # Group uncached addresses by normalized key so duplicates are only looked up once
+    pending = OrderedDict()
+    for i, address in enumerate(addresses):
+        coordinates = lookup_gazetteer(address)
+        if coordinates:
+            results[i] = coordinates
+            continue
+        
+        key = normalize_address(address)
+        hit, coordinates = _geocode_cache.get(key)
+        if hit:
+            results[i] = coordinates
+        else:
+            pending.setdefault(key, []).append(i)
+    
+    if not pending:
+        return results
+    
+    logger.info(f"Geocoding {len(pending)} of {len(addresses)} addresses not found in cache")
+    
+    if not MAPBOX_ACCESS_TOKEN:
+        logger.error("MAPBOX_ACCESS_TOKEN environment variable not set")
+        return results
+    
+    keys = list(pending)
+    for start in range(0, len(keys), MAPBOX_BATCH_SIZE):
+        chunk_keys = keys[start:start + MAPBOX_BATCH_SIZE]
+        chunk_addresses = [addresses[pending[key][0]] for key in chunk_keys]
+        
+        chunk_results = None
+        if _batch_geocoding_available:
+            chunk_results = _mapbox_batch_geocode(chunk_addresses, MAPBOX_ACCESS_TOKEN)
+        
+        if chunk_results is None:
+            # Batch geocoding is not available to every token; geocode one by one instead
+            chunk_results = _geocode_concurrently(chunk_addresses)
+        else:
+            for key, coordinates in zip(chunk_keys, chunk_results):
+                _geocode_cache.set(key, coordinates)
+        
+        for key, coordinates in zip(chunk_keys, chunk_results):
+            for i in pending[key]:
+                results[i] = coordinates
+    
+    return results
+
+def _geocode_concurrently(addresses: List[str]) -> List[Optional[Coordinates]]:
+    """
+    Geocode addresses one request each, at most MAPBOX_GEOCODE_CONCURRENCY at a time
+    
+    Returns:
+        List of coordinates (or None per address without a result), in the same order as addresses
+    """
+    pool = Pool(min(MAPBOX_GEOCODE_CONCURRENCY, len(addresses)))
+    return pool.map(geocode_address, addresses)
+
+def _mapbox_batch_geocode(addresses: List[str], mapbox_token: str) -> Optional[List[Optional[Coordinates]]]:
+    """
+    Geocode up to MAPBOX_BATCH_SIZE addresses in a single Mapbox request
+    
+    Returns:
+        List of coordinates (or None per address without a result), or None if the request failed
+    """
+    global _batch_geocoding_available
+    
+    try:
+        # Queries are separated by ";" so each one must be fully URL encoded
+        joined = ";".join(requests.utils.quote(address, safe='') for address in addresses)
+        
+        # Batch geocoding is served by the permanent endpoint
+        url = f"https://api.mapbox.com/geocoding/v5/mapbox.places-permanent/{joined}.json"
+        params = {
+            "access_token": mapbox_token,
+            "limit": 1,  # We only need the top result per address
+            "country": "US"  # Limit to US results
+        }
+        
+        logger.info(f"Batch geocoding {len(addresses)} addresses")
+        response = get_session().get(url, params=params, timeout=10)
+        
+        if response.status_code in (401, 403):
+            logger.warning(f"Mapbox batch API refused this token ({response.status_code}), "
+                           "geocoding addresses one by one from now on")
+            _batch_geocoding_available = False
+            return None
+        
+        if response.status_code != 200:
+            logger.warning(f"Mapbox batch API error: {response.status_code} - {response.text}")
+            return None
+        
+        # A batch returns one FeatureCollection per query, a single query returns just the one
+        data = response.json()
+        collections = data if isinstance(data, list) else [data]
+        
+        if len(collections) != len(addresses):
+            logger.warning(f"Mapbox batch API returned {len(collections)} results for {len(addresses)} addresses")
+            return None
+        
+        results = []
+        for address, collection in zip(addresses, collections):
+            features = collection.get("features") if collection else None
+            if not features:
+                logger.warning(f"No geocoding results found for address: {address}")
+                results.append(None)
+                continue
+            
+            # Mapbox returns [longitude, latitude]
+            coordinates = features[0]["center"]
+            results.append((coordinates[1], coordinates[0]))
+        
+        return results
+        
+    except Exception as e:
+        logger.error(f"Error batch geocoding addresses: {str(e)}")
+        return None
@@ -0,0 +1,142 @@
+import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+# Set up logging for this module
+logger = logging.getLogger('la_fires_api.http')
+
+# Connection pool settings for outbound HTTP (Mapbox, ca.gov)
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 32
+
+# Global session instance
+_session = None
+
+def get_session() -> requests.Session:
+    """
+    Get or create the shared requests Session.
+
+    Reusing one session keeps HTTPS connections to the same host alive
+    between requests, saving the TCP and TLS handshake on every call.
+
+    Returns:
+        requests.Session instance
+    """
+    global _session
+
+    if _session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False  # Hand the last response back so callers can log it
+        )
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+
+    return _session
+
+_stdlib_response_json = requests.Response.json
+
+def _orjson_response_json(self, **kwargs):
+    # orjson only reads UTF-8 and takes no json.loads options; anything else (including
+    # invalid JSON, so callers still get requests' JSONDecodeError) goes to the original
+    if not kwargs and self.content:
+        try:
+            return orjson.loads(self.content)
+        except orjson.JSONDecodeError:
+            pass
+    return _stdlib_response_json(self, **kwargs)
+
+def use_orjson_for_responses() -> None:
+    """
+    Parse every requests Response.json() with orjson, including the ones made
+    inside the Weaviate client (up to 1000 shelters per query) and for Mapbox.
+    Safe to call more than once.
+    """
+    requests.Response.json = _orjson_response_json
+
+class CachedPage:
+    """
+    Process-local cache for a parsed web page.
+
+    The parsed payload is served from memory for `ttl` seconds. After that the
+    page is re-requested with If-None-Match / If-Modified-Since, so an unchanged
+    page costs a 304 instead of a full download and parse.
+    """
+
+    def __init__(self, url: str, ttl: float, timeout: float = 10, stream: bool = False):
+        """
+        Initialize the page cache
+
+        Args:
+            url: URL of the page to fetch
+            ttl: Seconds to serve the cached payload before revalidating
+            timeout: Request timeout in seconds
+            stream: Hand the parser an unread response so it can consume response.raw incrementally
+        """
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._payload = None
+        self._fetched_at = 0.0
+        self._etag = None
+        self._last_modified = None
+
+    def get(self, parse: Callable[[requests.Response], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the cached payload, fetching and parsing the page if it has expired.
+        Only payloads with "success" set are cached.
+
+        Args:
+            parse: Function that turns a 200 response into the payload dict
+
+        Returns:
+            The parsed payload
+
+        Raises:
+            requests.RequestException: If the page could not be fetched
+        """
+        # Holding the lock while fetching means concurrent misses wait for one refresh
+        with self._lock:
+            now = time.monotonic()
+            if self._payload is not None and now - self._fetched_at < self.ttl:
+                return self._payload
+
+            headers = {}
+            if self._payload is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
+
+            logger.info(f"Fetching {self.url}")
+            # Closing the response returns its connection to the pool even if parsing fails
+            with get_session().get(self.url, headers=headers, timeout=self.timeout, stream=self.stream) as response:
+                if response.status_code == 304 and self._payload is not None:
+                    logger.info(f"{self.url} not modified, reusing cached content")
+                    self._fetched_at = now
+                    return self._payload
+
+                response.raise_for_status()  # Raise exception for 4XX/5XX responses
+                payload = parse(response)
+
+            if payload.get("success"):
+                self._payload = payload
+                self._fetched_at = now
+                self._etag = response.headers.get("ETag")
+                self._last_modified = response.headers.get("Last-Modified")
+
+            return payload
+
@@ -1,18 +1,55 @@
 import logging
-import weaviate
 import os
+import threading
 import uuid
 import numpy as np
+from gevent import monkey
+from gevent.threadpool import ThreadPool
 from typing import Dict, Any, List, Optional, Tuple
-from sentence_transformers import SentenceTransformer
 import datetime
+from functools import cache, lru_cache
 
 # Set up logging for this module
 logger = logging.getLogger('la_fires_api.missing')
 
 # Constants
 MISSING_CLASS_NAME = "Missing"
+WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
 MODEL_NAME = "all-MiniLM-L6-v2"  # Smaller but efficient model
+ENCODE_BATCH_SIZE = 64
+VECTOR_CACHE_SIZE = 4096  # Number of recent texts whose vectors are kept in memory
+# Vectors are unit length, so 4 decimal places keep cosine distances accurate to ~1e-4
+# while cutting the JSON sent to Weaviate to under half
+VECTOR_DECIMALS = 4
+ENCODE_THREADS = max(1, (os.cpu_count() or 2) - 1)
+
+def _to_wire(vector: np.ndarray) -> List[float]:
+    """Round a vector for JSON transport to Weaviate"""
+    # Rounding in float64 gives short decimal reprs; float32 values print with ~17 digits
+    return np.round(vector.astype(np.float64), VECTOR_DECIMALS).tolist()
+
+def _rfc3339_now() -> str:
+    """Current UTC time as an RFC3339 string, built directly instead of via strftime"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return f"{now.year:04d}-{now.month:02d}-{now.day:02d}T{now.hour:02d}:{now.minute:02d}:{now.second:02d}Z"
+
+@cache
+def _get_model():
+    """
+    Load the sentence transformer model, in half precision on GPU.
+    torch and sentence_transformers take seconds to import, so they are only
+    loaded when the first missing-entry request needs the model.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(MODEL_NAME, device=device)
+    model.eval()
+    if device == "cuda":
+        model.half()
+    logger.info(f"Initialized sentence transformer model: {MODEL_NAME} on {device}")
+    return model
 
 class MissingService:
     """Service for managing missing person/pet entries with vector search"""
@@ -22,20 +59,35 @@ class MissingService:
         Initialize the Missing service
         
         Args:
-            weaviate_url: URL of the Weaviate instance (default: http://localhost:8080)
+            weaviate_url: URL of the Weaviate instance (default: WEAVIATE_URL)
         """
-        self.weaviate_url = weaviate_url or "http://localhost:8080"
+        self.weaviate_url = weaviate_url or WEAVIATE_URL
         self.client = None
         self.model = None
+        self._batch_lock = threading.Lock()
+        
+        # Set once the class is known to exist, so create_schema is a no-op afterwards
+        self._schema_ready = False
+        
+        # Under gevent, encoding runs in native threads so the CPU-bound model forward
+        # pass doesn't stall the event loop (and every other in-flight request)
+        self._encode_pool = ThreadPool(maxsize=ENCODE_THREADS) if monkey.is_module_patched("threading") else None
+        
+        # Encoding is deterministic for a given model and text, so repeated queries can
+        # skip the model. The cache belongs to this instance and therefore to its model.
+        self._vectorize_cached = lru_cache(maxsize=VECTOR_CACHE_SIZE)(self._vectorize_uncached)
         
         try:
+            import weaviate
+            
             # Initialize Weaviate client
             self.client = weaviate.Client(self.weaviate_url)
             logger.info(f"Connected to Weaviate at {self.weaviate_url}")
             
-            # Initialize the sentence transformer model
-            self.model = SentenceTransformer(MODEL_NAME)
-            logger.info(f"Initialized sentence transformer model: {MODEL_NAME}")
+            self.model = _get_model()
+            
+            # Pre-warm the model so the first request doesn't pay for lazy initialization
+            self.vectorize_texts(["warm up"])
         except Exception as e:
             logger.error(f"Failed to initialize MissingService: {str(e)}")
             raise
@@ -47,17 +99,18 @@ class MissingService:
         Returns:
             Boolean indicating success
         """
+        if self._schema_ready:
+            return True
+        
         if not self.client:
             logger.error("Weaviate client not initialized")
             return False
             
         try:
-            # Check if schema already exists
-            schema = self.client.schema.get()
-            existing_classes = [c["class"] for c in schema.get("classes", [])]
-            
-            if MISSING_CLASS_NAME in existing_classes:
+            # Check if schema already exists; fetches just this class, not the whole schema
+            if self.client.schema.exists(MISSING_CLASS_NAME):
                 logger.info(f"Schema for {MISSING_CLASS_NAME} already exists")
+                self._schema_ready = True
                 return True
                 
             # Define the missing class schema
@@ -82,33 +135,68 @@ class MissingService:
             # Create the schema
             self.client.schema.create_class(missing_class)
             logger.info(f"Created schema for {MISSING_CLASS_NAME}")
+            self._schema_ready = True
             return True
             
         except Exception as e:
             logger.error(f"Failed to create schema: {str(e)}")
             return False
     
-    def vectorize_text(self, text: str) -> List[float]:
+    def vectorize_texts(self, texts: List[str]) -> np.ndarray:
         """
-        Convert text to a vector representation
+        Convert a batch of texts to normalized vector representations in one model pass
         
         Args:
-            text: The text to vectorize
+            texts: The texts to vectorize
             
         Returns:
-            Vector representation as a list of floats
+            Array of shape (len(texts), dimensions) with one float32 vector per text
         """
         if not self.model:
             logger.error("Sentence transformer model not initialized")
             raise RuntimeError("Sentence transformer model not initialized")
             
         try:
-            vector = self.model.encode(text)
-            return vector.tolist()
+            if self._encode_pool is not None:
+                vectors = self._encode_pool.apply(self._encode, (texts,))
+            else:
+                vectors = self._encode(texts)
+            return vectors.astype(np.float32, copy=False)
         except Exception as e:
             logger.error(f"Failed to vectorize text: {str(e)}")
             raise
     
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        import torch
+        
+        # inference_mode is thread-local, so it is entered in whichever thread runs the model
+        with torch.inference_mode():
+            return self.model.encode(
+                texts,
+                batch_size=ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+    
+    def _vectorize_uncached(self, text: str) -> np.ndarray:
+        vector = self.vectorize_texts([text])[0]
+        # Cached vectors are shared between callers, so make them read-only
+        vector.flags.writeable = False
+        return vector
+    
+    def vectorize_text(self, text: str) -> List[float]:
+        """
+        Convert text to a vector representation, reusing cached vectors for repeated texts
+        
+        Args:
+            text: The text to vectorize
+            
+        Returns:
+            Vector representation as a list of floats
+        """
+        return _to_wire(self._vectorize_cached(text))
+    
     def add_missing_entry(self, content: str) -> str:
         """
         Add a missing person/pet entry to Weaviate
@@ -119,40 +207,69 @@ class MissingService:
         Returns:
             ID of the created object or empty string if failed
         """
+        entry_ids = self.add_missing_entries([content])
+        return entry_ids[0] if entry_ids else ""
+    
+    def add_missing_entries(self, contents: List[str]) -> List[str]:
+        """
+        Add several missing person/pet entries to Weaviate using the batch API,
+        vectorizing all of them in one model pass
+        
+        Args:
+            contents: Descriptions of the missing persons/pets
+            
+        Returns:
+            List with the ID of each created object, or an empty string for each entry that failed
+        """
         if not self.client:
             logger.error("Weaviate client not initialized")
-            return ""
+            return [""] * len(contents)
+        
+        if not contents:
+            return []
             
         try:
             # Ensure schema exists
             self.create_schema()
             
-            # Vectorize the content
-            vector = self.vectorize_text(content)
+            # Vectorize all contents at once
+            vectors = self.vectorize_texts(contents)
             
             # Prepare data for Weaviate - use RFC3339 format for timestamp
             # Format example: 2020-01-01T00:00:00Z
-            current_time = datetime.datetime.now(datetime.timezone.utc)
-            rfc3339_time = current_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+            # Computed once and shared by every object in the batch
+            rfc3339_time = _rfc3339_now()
             
-            data_object = {
-                "content": content,
-                "timestamp": rfc3339_time
-            }
+            failed_ids = set()
             
-            # Add object with vector
-            result = self.client.data_object.create(
-                data_object=data_object,
-                class_name=MISSING_CLASS_NAME,
-                vector=vector
-            )
+            def check_batch_results(results):
+                # Weaviate reports per-object errors in the batch response rather than raising
+                for result in results or []:
+                    errors = result.get("result", {}).get("errors")
+                    if errors:
+                        failed_ids.add(result.get("id"))
+                        logger.error(f"Failed to add missing entry {result.get('id')}: {errors}")
+            
+            entry_ids = []
+            
+            # The client's batch is shared, so only one request may fill and flush it at a time
+            with self._batch_lock:
+                self.client.batch.configure(batch_size=100, dynamic=True, callback=check_batch_results)
+                with self.client.batch as batch:
+                    for content, vector in zip(contents, vectors):
+                        data_object = {
+                            "content": content,
+                            "timestamp": rfc3339_time
+                        }
+                        entry_ids.append(batch.add_data_object(data_object, MISSING_CLASS_NAME, vector=_to_wire(vector)))
             
-            logger.info(f"Added missing entry with ID: {result}")
-            return result
+            entry_ids = [entry_id if entry_id not in failed_ids else "" for entry_id in entry_ids]
+            logger.info(f"Added {sum(1 for entry_id in entry_ids if entry_id)} of {len(contents)} missing entries")
+            return entry_ids
             
         except Exception as e:
-            logger.error(f"Failed to add missing entry: {str(e)}")
-            return ""
+            logger.error(f"Failed to add missing entries: {str(e)}")
+            return [""] * len(contents)
     
     def search_missing_entries(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -170,14 +287,14 @@ class MissingService:
             return []
             
         try:
-            # Vectorize the query
-            query_vector = self.vectorize_text(query)
+            # Vectorize the query; repeated queries are served from the vector cache
+            query_vector = self._vectorize_cached(query)
             
             # Perform vector search
             result = (
                 self.client.query
                 .get(MISSING_CLASS_NAME, ["content", "timestamp"])
-                .with_near_vector({"vector": query_vector})
+                .with_near_vector({"vector": _to_wire(query_vector)})
                 .with_limit(limit)
                 .do()
             )
@@ -250,7 +367,6 @@ def get_missing_service() -> MissingService:
     global _missing_service
     
     if _missing_service is None:
-        weaviate_url = os.getenv("WEAVIATE_URL", "http://localhost:8080")
-        _missing_service = MissingService(weaviate_url)
+        _missing_service = MissingService(WEAVIATE_URL)
     
     return _missing_service 
\ No newline at end of file
@@ -1,44 +1,47 @@
 import requests
-from bs4 import BeautifulSoup, NavigableString, Tag
+import re
+from lxml import etree, html as lxml_html
 import logging
 import json
+import os
 from typing import Dict, Any, Optional, List, Union
+from http_client import CachedPage
 
 # Set up logging for this module
 logger = logging.getLogger('la_fires_api.progress_tracker')
 
+# The progress content lives in the "col-lg-9 pt-lg-3" div; match whole class tokens like div.col-lg-9.pt-lg-3
+_TARGET_DIV_XPATH = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' col-lg-9 ')]"
+    "[contains(concat(' ', normalize-space(@class), ' '), ' pt-lg-3 ')][1]"
+)
+
+# The page is served as UTF-8; decoding in the parser avoids building response.text
+_HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+
+PROGRESS_URL = "https://www.ca.gov/lafires/track-progress/"
+
+# The page is updated a few times a day at most, so serve the parsed result from memory for a while
+PROGRESS_CACHE_TTL = int(os.getenv("PROGRESS_CACHE_TTL", "600"))
+
+_progress_page = CachedPage(PROGRESS_URL, ttl=PROGRESS_CACHE_TTL)
+
+# Whitespace clean-up for the extracted text
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPACES_RE = re.compile(r'[ \t]+')
+_SPACES_AROUND_NEWLINE_RE = re.compile(r' ?\n ?')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
 def get_progress_data() -> Dict[str, Any]:
     """
     Fetches and parses progress data from the LA Fires tracking webpage.
+    The parsed result is cached for PROGRESS_CACHE_TTL seconds.
     
     Returns:
         Dict containing the parsed content as plain text
     """
-    url = "https://www.ca.gov/lafires/track-progress/"
-    
     try:
-        # Step 1: Fetch the webpage content
-        logger.info(f"Fetching progress data from {url}")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        
-        # Step 2: Parse HTML with BeautifulSoup using lxml parser for speed
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # Step 3: Find the target div
-        target_div = soup.select_one('div.col-lg-9.pt-lg-3')
-        
-        if not target_div:
-            logger.warning("Target div not found on the webpage. Structure might have changed.")
-            return {"error": "Unable to find target content on the webpage"}
-        
-        # Step 4: Extract and format the text content
-        formatted_text = extract_formatted_text(target_div)
-        
-        return {
-            "success": True, 
-            "content": formatted_text
-        }
+        return _progress_page.get(parse_progress_page)
     
     except requests.RequestException as e:
         # Handle network errors
@@ -52,12 +55,41 @@ def get_progress_data() -> Dict[str, Any]:
         logger.error(error_msg)
         return {"success": False, "error": error_msg}
 
+def parse_progress_page(response: requests.Response) -> Dict[str, Any]:
+    """
+    Parse the progress content out of a fetched LA Fires tracking webpage
+    
+    Args:
+        response: The HTTP response for the page
+        
+    Returns:
+        Dict containing the parsed content as plain text
+    """
+    # Parse the raw bytes with lxml directly
+    tree = lxml_html.fromstring(response.content, parser=_HTML_PARSER)
+    
+    # Find the target div
+    target_divs = _TARGET_DIV_XPATH(tree)
+    target_div = target_divs[0] if target_divs else None
+    
+    if target_div is None:
+        logger.warning("Target div not found on the webpage. Structure might have changed.")
+        return {"error": "Unable to find target content on the webpage"}
+    
+    # Extract and format the text content
+    formatted_text = extract_formatted_text(target_div)
+    
+    return {
+        "success": True, 
+        "content": formatted_text
+    }
+
 def extract_formatted_text(element) -> str:
     """
     Recursively extracts text from an HTML element while preserving logical structure.
     
     Args:
-        element: BeautifulSoup element to extract text from
+        element: lxml element to extract text from
         
     Returns:
         Formatted plain text with appropriate line breaks
@@ -65,60 +97,94 @@ def extract_formatted_text(element) -> str:
     if element is None:
         return ""
     
-    # Initialize an empty result string
-    result = ""
+    # Collect the pieces in a list and join once, rather than concatenating strings
+    parts = []
+    
+    # Text before the first child element
+    _append_text(parts, element.text)
     
     # Process each child element to preserve structure
-    for child in element.children:
-        # Skip script and style tags
-        if child.name in ['script', 'style']:
-            continue
-            
-        # If it's a string node (NavigableString)
-        if isinstance(child, NavigableString):
-            text = child.strip()
-            if text:
-                result += text + " "
+    for child in element:
+        tag = child.tag
         
-        # If it's an HTML element
-        elif isinstance(child, Tag):
+        # Skip comments and processing instructions (whose tag is not a string),
+        # and script and style tags
+        if isinstance(tag, str) and tag not in _SKIPPED_TAGS:
             # Extract text from this child
             child_text = extract_formatted_text(child)
             
             # Add appropriate line breaks based on tag type
-            if child.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                # Headers get line breaks before and after
-                result = result.rstrip() + "\n\n" + child_text + "\n\n"
-            elif child.name == 'p':
-                # Paragraphs get a line break after
-                result += child_text.strip() + "\n\n"
-            elif child.name == 'br':
-                # Line breaks
-                result += "\n"
-            elif child.name in ['li']:
-                # List items get a bullet point and line break
-                result += "• " + child_text.strip() + "\n"
-            elif child.name in ['ul', 'ol']:
-                # Lists have their own formatting via list items
-                result += child_text
-            elif child.name == 'div':
-                # Divs might be used for sections
-                div_text = child_text.strip()
-                if div_text:
-                    result += div_text + "\n\n"
+            handler = _TAG_HANDLERS.get(tag)
+            if handler:
+                handler(parts, child_text)
             else:
                 # Other elements just add their text
-                result += child_text
-    
-    # Clean up the result: normalize whitespace
-    # Replace multiple spaces with a single space
-    result = ' '.join(result.split())
+                parts.append(child_text)
+        
+        # Text following a child element belongs to this element
+        _append_text(parts, child.tail)
     
-    # Normalize line breaks (no more than 2 consecutive)
-    while "\n\n\n" in result:
-        result = result.replace("\n\n\n", "\n\n")
+    # Clean up the result in a few linear passes: collapse runs of spaces,
+    # drop spaces next to line breaks and allow at most one blank line
+    result = _SPACES_RE.sub(' ', "".join(parts))
+    result = _SPACES_AROUND_NEWLINE_RE.sub('\n', result)
+    result = _BLANK_LINES_RE.sub('\n\n', result)
     
-    return result
+    return result.strip()
+
+def _append_text(parts: List[str], text: Optional[str]) -> None:
+    # Whitespace inside HTML text is insignificant, so line breaks only come from the markup
+    if text:
+        text = _WHITESPACE_RE.sub(' ', text).strip()
+        if text:
+            parts.append(text + " ")
+
+def _rstrip_parts(parts: List[str]) -> None:
+    # Strip trailing whitespace from the collected parts without joining them
+    while parts:
+        last = parts[-1].rstrip()
+        if last:
+            parts[-1] = last
+            return
+        parts.pop()
+
+def _format_header(parts: List[str], child_text: str) -> None:
+    # Headers get line breaks before and after
+    _rstrip_parts(parts)
+    parts.append("\n\n" + child_text + "\n\n")
+
+def _format_paragraph(parts: List[str], child_text: str) -> None:
+    # Paragraphs get a line break after
+    parts.append(child_text + "\n\n")
+
+def _format_line_break(parts: List[str], child_text: str) -> None:
+    parts.append("\n")
+
+def _format_list_item(parts: List[str], child_text: str) -> None:
+    # List items get a bullet point and line break
+    parts.append("• " + child_text + "\n")
+
+def _format_list(parts: List[str], child_text: str) -> None:
+    # Lists have their own formatting via list items
+    parts.append(child_text)
+
+def _format_div(parts: List[str], child_text: str) -> None:
+    # Divs might be used for sections
+    if child_text:
+        parts.append(child_text + "\n\n")
+
+# Formatting by tag, looked up once per element instead of testing a chain of conditions
+_HEADER_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+_SKIPPED_TAGS = frozenset({'script', 'style'})
+_TAG_HANDLERS = {
+    **{tag: _format_header for tag in _HEADER_TAGS},
+    'p': _format_paragraph,
+    'br': _format_line_break,
+    'li': _format_list_item,
+    'ul': _format_list,
+    'ol': _format_list,
+    'div': _format_div
+}
 
 def process_progress_data() -> Dict[str, Any]:
     """
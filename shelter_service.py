@@ -1,9 +1,12 @@
-import weaviate
 import logging
 import os
-from typing import Dict, Any, List, Optional
-import json
-from math import radians, cos, sin, asin, sqrt
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional
+from math import pi, cos, sin, asin, sqrt, degrees, radians
+from functools import cache
+from dataclasses import dataclass
+import numpy as np
 
 # Set up logging for this module
 logger = logging.getLogger('la_fires_api.shelter_service')
@@ -11,6 +14,167 @@ logger = logging.getLogger('la_fires_api.shelter_service')
 # Weaviate schema class name for shelters
 SHELTER_CLASS_NAME = "Shelter"
 
+# Resolved once at import rather than on every service construction
+WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
+
+# Shelter properties fetched from Weaviate
+SHELTER_PROPERTIES = [
+    "hotelName",
+    "address", 
+    "bookingLink", 
+    "phoneNumber", 
+    "notes", 
+    "location { latitude longitude }"
+]
+
+# Shelter data changes rarely, so serve the full list from memory for a while
+SHELTER_CACHE_TTL = int(os.getenv("SHELTER_CACHE_TTL", "300"))
+
+# After a failed load, wait this long before starting another background reload
+SHELTER_REFRESH_BACKOFF = int(os.getenv("SHELTER_REFRESH_BACKOFF", "30"))
+
+# Shelters fetched per request when paging through the whole class
+SHELTER_PAGE_SIZE = 500
+
+# Radius of earth in kilometers
+EARTH_RADIUS_KM = 6371.0
+DEG2RAD = pi / 180.0
+
+# Slack added to the search bounding box so float32 distances right at the
+# radius are never cut off by the box (about 100m)
+BOX_MARGIN_DEG = 1e-3
+
+@cache
+def _get_haversine_kernel():
+    """Load the optional Numba haversine kernel on first use, or None if numba isn't installed"""
+    try:
+        from utils_numba import haversine_km
+        return haversine_km
+    except ImportError:
+        logger.info("numba not installed, using NumPy for shelter distances")
+        return None
+
+@dataclass(frozen=True)
+class ShelterTable:
+    """
+    Shelters in columnar form: one array per field, aligned by index.
+    Distance math runs on the contiguous coordinate arrays, and dicts are only
+    built for the rows a caller actually returns.
+    """
+    hotel_names: np.ndarray
+    addresses: np.ndarray
+    booking_links: np.ndarray
+    phone_numbers: np.ndarray
+    notes: np.ndarray
+    lats: np.ndarray
+    lons: np.ndarray
+    # Coordinates in radians, precomputed for distance calculations. float32 is
+    # accurate to well under a meter and halves the memory the distance pass reads.
+    lats_rad: np.ndarray
+    lons_rad: np.ndarray
+    cos_lats: np.ndarray
+    
+    @classmethod
+    def from_records(cls, shelters: List[Dict[str, Any]]) -> "ShelterTable":
+        """Build a table from shelter dicts in our API format"""
+        def text_column(key):
+            column = np.empty(len(shelters), dtype=object)
+            column[:] = [shelter[key] for shelter in shelters]
+            return column
+        
+        # Fill the coordinate columns straight from the dicts, without intermediate lists
+        count = len(shelters)
+        lats = np.fromiter((shelter['lat'] for shelter in shelters), dtype=np.float64, count=count)
+        lons = np.fromiter((shelter['lon'] for shelter in shelters), dtype=np.float64, count=count)
+        lats_rad = np.radians(lats).astype(np.float32)
+        
+        return cls(
+            hotel_names=text_column('hotelname'),
+            addresses=text_column('address'),
+            booking_links=text_column('bookinglink'),
+            phone_numbers=text_column('phonenumber'),
+            notes=text_column('notes'),
+            lats=lats,
+            lons=lons,
+            lats_rad=lats_rad,
+            lons_rad=np.radians(lons).astype(np.float32),
+            cos_lats=np.cos(lats_rad)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.lats)
+    
+    def row(self, i: int) -> Dict[str, Any]:
+        """Materialize one shelter as a dict in our API format"""
+        return {
+            "hotelname": self.hotel_names[i],
+            "address": self.addresses[i],
+            "bookinglink": self.booking_links[i],
+            "lat": float(self.lats[i]),
+            "lon": float(self.lons[i]),
+            "phonenumber": self.phone_numbers[i],
+            "notes": self.notes[i]
+        }
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize every shelter as a dict in our API format"""
+        return [self.row(i) for i in range(len(self))]
+    
+    def rows_in_box(self, lat: float, lon: float, distance_km: float) -> np.ndarray:
+        """
+        Find the shelters inside the lat/lon bounding box of a search circle, a
+        superset of the shelters within distance_km that costs only comparisons
+        
+        Returns:
+            Array of row indices, in table order
+        """
+        # No point on the circle is further than its angular radius in latitude
+        angle = distance_km / EARTH_RADIUS_KM
+        mask = np.abs(self.lats - lat) <= degrees(angle) + BOX_MARGIN_DEG
+        
+        # Widest longitude extent of a spherical cap; if the cap reaches a pole,
+        # every longitude is in range
+        if angle < pi / 2 and sin(angle) < cos(radians(lat)):
+            dlon = degrees(asin(sin(angle) / cos(radians(lat)))) + BOX_MARGIN_DEG
+            # Wrap the difference into [-180, 180) so boxes across the antimeridian work
+            mask &= np.abs((self.lons - lon + 180) % 360 - 180) <= dlon
+        
+        return np.flatnonzero(mask)
+    
+    def distances_from(self, lat: float, lon: float, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculate the great circle distance from a point to every shelter
+        in one vectorized pass
+        
+        Args:
+            lat: Latitude of the point
+            lon: Longitude of the point
+            rows: Only compute distances for these row indices (default: all rows)
+        
+        Returns:
+            float32 array of distances in kilometers, aligned with the table rows
+            (or with rows, if given)
+        """
+        # float32 scalars keep NumPy from promoting the arrays to float64
+        lat_r = np.float32(np.radians(lat))
+        lon_r = np.float32(np.radians(lon))
+        
+        lats_rad, lons_rad, cos_lats = self.lats_rad, self.lons_rad, self.cos_lats
+        if rows is not None:
+            lats_rad, lons_rad, cos_lats = lats_rad[rows], lons_rad[rows], cos_lats[rows]
+        
+        kernel = _get_haversine_kernel()
+        if kernel is not None:
+            return kernel(lat_r, lon_r, lats_rad, lons_rad, cos_lats)
+        
+        dlat = lats_rad - lat_r
+        dlon = lons_rad - lon_r
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat_r) * cos_lats * np.sin(dlon / 2) ** 2
+        
+        return np.float32(2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(a))
+
+EMPTY_SHELTER_TABLE = ShelterTable.from_records([])
+
 class ShelterService:
     """Service class for managing shelter data with Weaviate"""
     
@@ -21,11 +185,31 @@ class ShelterService:
         Args:
             weaviate_url: URL to the Weaviate instance, defaults to environment variable
         """
-        # Get Weaviate URL from environment variable if not provided
-        self.weaviate_url = weaviate_url or os.getenv("WEAVIATE_URL", "http://localhost:8080")
+        self.weaviate_url = weaviate_url or WEAVIATE_URL
         self.client = None
         
+        # Shelters cached by get_shelter_table(); tables are immutable, so readers
+        # only need a reference and the lock just serializes refreshes
+        self._table = None
+        self._table_loaded_at = 0.0
+        self._cache_lock = threading.RLock()
+        # Guards only the _refreshing flag, so starting a background reload never
+        # waits on _cache_lock, which is held for the whole Weaviate fetch
+        self._refreshing = False
+        self._refresh_lock = threading.Lock()
+        self._load_failed_at = None
+        
+        # Weaviate before 1.18 has no cursor API; set to False the first time it
+        # rejects "after" so later full fetches go straight to offset paging
+        self._cursor_supported = True
+        self._batch_lock = threading.Lock()
+        
+        # Set once the class is known to exist, so create_schema is a no-op afterwards
+        self._schema_ready = False
+        
         try:
+            import weaviate
+            
             # Connect to Weaviate
             self.client = weaviate.Client(self.weaviate_url)
             logger.info(f"Connected to Weaviate at {self.weaviate_url}")
@@ -40,17 +224,18 @@ class ShelterService:
         Returns:
             Boolean indicating success
         """
+        if self._schema_ready:
+            return True
+        
         if not self.client:
             logger.error("Weaviate client not initialized")
             return False
             
         try:
-            # Check if schema already exists
-            schema = self.client.schema.get()
-            existing_classes = [c["class"] for c in schema.get("classes", [])]
-            
-            if SHELTER_CLASS_NAME in existing_classes:
+            # Check if schema already exists; fetches just this class, not the whole schema
+            if self.client.schema.exists(SHELTER_CLASS_NAME):
                 logger.info(f"Schema for {SHELTER_CLASS_NAME} already exists")
+                self._schema_ready = True
                 return True
                 
             # Define the shelter class schema
@@ -94,12 +279,27 @@ class ShelterService:
             # Create the schema
             self.client.schema.create_class(shelter_class)
             logger.info(f"Created schema for {SHELTER_CLASS_NAME}")
+            self._schema_ready = True
             return True
                 
         except Exception as e:
             logger.error(f"Failed to create schema: {str(e)}")
             return False
     
+    def _to_weaviate_object(self, shelter_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert the data format from our API to Weaviate's format"""
+        return {
+            "hotelName": shelter_data.get("hotelname", ""),
+            "address": shelter_data.get("address", ""),
+            "bookingLink": shelter_data.get("bookinglink", ""),
+            "location": {
+                "latitude": float(shelter_data.get("lat", 0)),
+                "longitude": float(shelter_data.get("lon", 0))
+            },
+            "phoneNumber": shelter_data.get("phonenumber", ""),
+            "notes": shelter_data.get("notes", "")
+        }
+    
     def add_shelter(self, shelter_data: Dict[str, Any]) -> str:
         """
         Add a shelter to the Weaviate database
@@ -115,18 +315,7 @@ class ShelterService:
             return ""
             
         try:
-            # Convert the data format from our API to Weaviate's format
-            weaviate_data = {
-                "hotelName": shelter_data.get("hotelname", ""),
-                "address": shelter_data.get("address", ""),
-                "bookingLink": shelter_data.get("bookinglink", ""),
-                "location": {
-                    "latitude": float(shelter_data.get("lat", 0)),
-                    "longitude": float(shelter_data.get("lon", 0))
-                },
-                "phoneNumber": shelter_data.get("phonenumber", ""),
-                "notes": shelter_data.get("notes", "")
-            }
+            weaviate_data = self._to_weaviate_object(shelter_data)
             
             # Add the shelter to Weaviate
             result = self.client.data_object.create(
@@ -135,12 +324,71 @@ class ShelterService:
             )
             
             logger.info(f"Added shelter: {shelter_data.get('address')} with ID: {result}")
+            
+            # The cached shelters no longer cover every shelter
+            self.invalidate_cache()
             return result
             
         except Exception as e:
             logger.error(f"Failed to add shelter: {str(e)}")
             return ""
     
+    def add_shelters_batch(self, shelters: List[Dict[str, Any]], batch_size: int = 100, num_workers: int = 4) -> List[str]:
+        """
+        Add several shelters to the Weaviate database using the batch API,
+        sending them in a few large requests instead of one request per shelter
+        
+        Args:
+            shelters: List of dictionaries containing shelter information
+            batch_size: Number of shelters sent per batch request
+            num_workers: Number of batch requests sent concurrently
+            
+        Returns:
+            List with the ID of each created object, or an empty string for each shelter that failed
+        """
+        if not self.client:
+            logger.error("Weaviate client not initialized")
+            return [""] * len(shelters)
+        
+        if not shelters:
+            return []
+            
+        try:
+            failed_ids = set()
+            
+            def check_batch_results(results):
+                # Weaviate reports per-object errors in the batch response rather than raising
+                for result in results or []:
+                    errors = result.get("result", {}).get("errors")
+                    if errors:
+                        failed_ids.add(result.get("id"))
+                        logger.error(f"Failed to add shelter {result.get('id')}: {errors}")
+            
+            shelter_ids = []
+            
+            # The client's batch is shared, so only one caller may fill and flush it at a time
+            with self._batch_lock:
+                self.client.batch.configure(
+                    batch_size=batch_size,
+                    dynamic=True,
+                    num_workers=num_workers,
+                    callback=check_batch_results
+                )
+                with self.client.batch as batch:
+                    for shelter_data in shelters:
+                        shelter_ids.append(batch.add_data_object(self._to_weaviate_object(shelter_data), SHELTER_CLASS_NAME))
+            
+            shelter_ids = [shelter_id if shelter_id not in failed_ids else "" for shelter_id in shelter_ids]
+            logger.info(f"Added {sum(1 for shelter_id in shelter_ids if shelter_id)} of {len(shelters)} shelters")
+            return shelter_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to add shelters: {str(e)}")
+            return [""] * len(shelters)
+            
+        finally:
+            self.invalidate_cache()
+    
     def get_shelters_by_location(self, lat: float, lon: float, distance_km: float = 10.0) -> List[Dict[str, Any]]:
         """
         Get shelters near a specific location using geospatial query
@@ -161,66 +409,51 @@ class ShelterService:
             # Log search parameters
             logger.info(f"Searching for shelters near coordinates: ({lat}, {lon}) within {distance_km}km")
             
-            # First, check how many shelters we have in total
-            count_result = self.client.query.aggregate(SHELTER_CLASS_NAME).with_meta_count().do()
-            total_count = 0
+            # Filter the cached shelters by distance locally when possible
+            table = self._cached_table()
+            if table is None:
+                # Cache is cold or being refreshed: let Weaviate apply the radius instead of
+                # waiting for the full shelter list, and warm the cache for later requests
+                self._refresh_cache_in_background()
+                return self.query_shelters_within(lat, lon, distance_km)
             
-            if count_result and "data" in count_result and "Aggregate" in count_result["data"] and SHELTER_CLASS_NAME in count_result["data"]["Aggregate"]:
-                if count_result["data"]["Aggregate"][SHELTER_CLASS_NAME]:
-                    total_count = count_result["data"]["Aggregate"][SHELTER_CLASS_NAME][0]["meta"]["count"]
+            logger.info(f"Retrieved {len(table)} shelters for manual distance filtering")
             
-            logger.info(f"Total shelter count in Weaviate before geospatial query: {total_count}")
-            
-            if total_count == 0:
+            if len(table) == 0:
                 logger.warning("No shelters found in the database, please ensure data is loaded")
                 return []
             
-            # Try a more direct approach - get all shelters and filter by distance in Python
-            all_shelters = self.get_all_shelters()
-            logger.info(f"Retrieved {len(all_shelters)} shelters for manual distance filtering")
+            # Cheap bounding-box comparisons first, then exact distances for just those candidates
+            candidates = table.rows_in_box(lat, lon, distance_km)
+            distances = table.distances_from(lat, lon, candidates)
             
-            # Print some sample shelters for debugging
-            if len(all_shelters) > 0:
-                sample_shelter = all_shelters[0]
-                logger.info(f"Sample shelter coordinates: ({sample_shelter.get('lat', 'N/A')}, {sample_shelter.get('lon', 'N/A')})")
-                logger.info(f"Search coordinates: ({lat}, {lon})")
-                
-                # Calculate distance for the sample shelter
-                sample_distance = self._haversine(lat, lon, sample_shelter.get('lat', 0), sample_shelter.get('lon', 0))
-                logger.info(f"Sample shelter distance: {sample_distance:.2f} km")
+            logger.info(f"Search coordinates: ({lat}, {lon}), {len(candidates)} shelters inside the search box")
+            
+            # Shelters within the radius, sorted by distance
+            inside = np.flatnonzero(distances <= distance_km)
+            inside = inside[np.argsort(distances[inside], kind='stable')]
             
-            # Filter shelters by distance using the Haversine formula
             nearby_shelters = []
-            for shelter in all_shelters:
-                shelter_lat = shelter.get('lat')
-                shelter_lon = shelter.get('lon')
+            for j in inside:
+                # Only the matching rows are turned into dicts
+                shelter = table.row(candidates[j])
+                # Add the calculated distance to the shelter data
+                shelter['distance_km'] = round(float(distances[j]), 2)
+                nearby_shelters.append(shelter)
+            
+            # Log the closest shelters even if outside the radius, skipping the work when INFO is off
+            if len(nearby_shelters) == 0 and logger.isEnabledFor(logging.INFO):
+                # Those may lie outside the box, so this needs every distance
+                distances = table.distances_from(lat, lon)
                 
-                if shelter_lat is not None and shelter_lon is not None:
-                    # Calculate distance using the haversine formula
-                    distance = self._haversine(lat, lon, shelter_lat, shelter_lon)
-                    
-                    # If within the specified radius, add to results
-                    if distance <= distance_km:
-                        # Add the calculated distance to the shelter data
-                        shelter['distance_km'] = round(distance, 2)
-                        nearby_shelters.append(shelter)
-            
-            # Log the closest shelters even if outside the radius
-            if len(all_shelters) > 0 and len(nearby_shelters) == 0:
-                # Sort all shelters by distance
-                for shelter in all_shelters:
-                    shelter_lat = shelter.get('lat')
-                    shelter_lon = shelter.get('lon')
-                    if shelter_lat is not None and shelter_lon is not None:
-                        shelter['distance_km'] = round(self._haversine(lat, lon, shelter_lat, shelter_lon), 2)
+                # Select the closest 3 without sorting every distance
+                k = min(3, len(distances))
+                closest = np.argpartition(distances, k - 1)[:k]
+                closest = closest[np.argsort(distances[closest])]
                 
-                closest_shelters = sorted(all_shelters, key=lambda x: x.get('distance_km', float('inf')))[:3]
                 logger.info(f"No shelters within {distance_km}km, but here are the closest ones:")
-                for i, shelter in enumerate(closest_shelters):
-                    logger.info(f"  {i+1}. {shelter.get('address')} - {shelter.get('distance_km')} km away")
-            
-            # Sort by distance
-            nearby_shelters.sort(key=lambda x: x.get('distance_km', float('inf')))
+                for rank, i in enumerate(closest):
+                    logger.info(f"  {rank+1}. {table.addresses[i]} - {distances[i]:.2f} km away")
             
             logger.info(f"Found {len(nearby_shelters)} shelters within {distance_km}km using manual distance calculation")
             
@@ -239,17 +472,88 @@ class ShelterService:
         Returns:
             Distance in kilometers
         """
-        # Convert decimal degrees to radians
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+        # Convert decimal degrees to radians with plain multiplies
+        lat1 *= DEG2RAD
+        lon1 *= DEG2RAD
+        lat2 *= DEG2RAD
+        lon2 *= DEG2RAD
         
         # Haversine formula
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        r = 6371  # Radius of earth in kilometers
+        sin_dlat = sin((lat2 - lat1) * 0.5)
+        sin_dlon = sin((lon2 - lon1) * 0.5)
+        a = sin_dlat * sin_dlat + cos(lat1) * cos(lat2) * sin_dlon * sin_dlon
         
-        return c * r
+        return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+    
+    def _cached_table(self) -> Optional[ShelterTable]:
+        """
+        Return the cached shelter table if it is fresh, without waiting for a refresh in progress
+        
+        Returns:
+            ShelterTable, or None if the cache can't answer right now
+        """
+        if not self._cache_lock.acquire(blocking=False):
+            return None
+        try:
+            if self._table is None or time.monotonic() - self._table_loaded_at >= SHELTER_CACHE_TTL:
+                return None
+            return self._table
+        finally:
+            self._cache_lock.release()
+    
+    def _refresh_cache_in_background(self) -> None:
+        """
+        Start reloading the shelter cache unless a background reload is already
+        running or the last load failed less than SHELTER_REFRESH_BACKOFF seconds ago
+        """
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            failed_at = self._load_failed_at
+            if failed_at is not None and time.monotonic() - failed_at < SHELTER_REFRESH_BACKOFF:
+                return
+            self._refreshing = True
+        
+        def refresh():
+            try:
+                self.get_shelter_table()
+            finally:
+                with self._refresh_lock:
+                    self._refreshing = False
+        
+        threading.Thread(target=refresh, name="shelter-cache-refresh", daemon=True).start()
+    
+    def invalidate_cache(self) -> None:
+        """Drop the cached shelters so the next get_shelter_table() call queries Weaviate"""
+        with self._cache_lock:
+            self._table = None
+    
+    def get_shelter_table(self) -> ShelterTable:
+        """
+        Get all shelters from the database as a columnar table. The table is
+        cached for SHELTER_CACHE_TTL seconds.
+        
+        Returns:
+            ShelterTable of all shelters (empty if the query failed)
+        """
+        if not self.client:
+            logger.error("Weaviate client not initialized")
+            return EMPTY_SHELTER_TABLE
+        
+        # Concurrent misses wait for a single refresh instead of all querying Weaviate
+        with self._cache_lock:
+            if self._table is not None and time.monotonic() - self._table_loaded_at < SHELTER_CACHE_TTL:
+                return self._table
+            
+            shelters = self._query_all_shelters()
+            if shelters is None:
+                self._load_failed_at = time.monotonic()
+                return EMPTY_SHELTER_TABLE
+            
+            self._table = ShelterTable.from_records(shelters)
+            self._table_loaded_at = time.monotonic()
+            self._load_failed_at = None
+            return self._table
     
     def get_all_shelters(self) -> List[Dict[str, Any]]:
         """
@@ -258,80 +562,206 @@ class ShelterService:
         Returns:
             List of all shelter objects
         """
+        return self.get_shelter_table().to_dicts()
+    
+    def get_one_shelter(self) -> Optional[Dict[str, Any]]:
+        """
+        Get a single shelter, e.g. as a reference point, without fetching every shelter
+        
+        Returns:
+            Shelter object, or None if there are no shelters or the query failed
+        """
         if not self.client:
             logger.error("Weaviate client not initialized")
-            return []
-            
+            return None
+        
         try:
-            # First, check how many shelters we have in total
-            count_result = self.client.query.aggregate(SHELTER_CLASS_NAME).with_meta_count().do()
-            total_count = 0
+            result = (
+                self.client.query
+                .get(SHELTER_CLASS_NAME, SHELTER_PROPERTIES)
+                .with_limit(1)
+                .do()
+            )
             
-            if count_result and "data" in count_result and "Aggregate" in count_result["data"] and SHELTER_CLASS_NAME in count_result["data"]["Aggregate"]:
-                if count_result["data"]["Aggregate"][SHELTER_CLASS_NAME]:
-                    total_count = count_result["data"]["Aggregate"][SHELTER_CLASS_NAME][0]["meta"]["count"]
+            shelters = self._parse_shelters(result)
+            return shelters[0] if shelters else None
             
-            logger.info(f"Total shelter count in Weaviate: {total_count}")
+        except Exception as e:
+            logger.error(f"Failed to query a shelter: {str(e)}")
+            return None
+    
+    def _query_all_shelters(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Query every shelter from Weaviate
+        
+        Returns:
+            List of all shelter objects, or None if the query failed
+        """
+        try:
+            # An empty result already tells us the database has no shelters
+            shelters = list(self.iter_all_shelters())
             
-            if total_count == 0:
+            if len(shelters) == 0:
                 logger.warning("No shelters found in the database")
-                return []
+                return shelters
+            
+            logger.info(f"Retrieved {len(shelters)} shelters")
+            return shelters
             
-            # Now get all shelters with a higher limit
+        except Exception as e:
+            logger.error(f"Failed to query all shelters: {str(e)}")
+            return None
+            
+    def iter_all_shelters(self, page_size: int = SHELTER_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every shelter, fetched from Weaviate a page at a time with the
+        cursor API, so there is no cap on the number of shelters and callers can
+        start on the first page before the rest arrive. Falls back to offset paging
+        on Weaviate versions without the cursor API.
+        
+        Args:
+            page_size: Number of shelters to fetch per request
+            
+        Yields:
+            Shelter objects in our API format
+            
+        Raises:
+            RuntimeError: If Weaviate reports an error for a page
+        """
+        cursor = None
+        fetched = 0
+        while True:
             query = (
                 self.client.query
-                .get(SHELTER_CLASS_NAME, [
-                    "hotelName",
-                    "address", 
-                    "bookingLink", 
-                    "phoneNumber", 
-                    "notes", 
-                    "location { latitude longitude }"
-                ])
-                .with_limit(1000)  # Increased limit
+                .get(SHELTER_CLASS_NAME, SHELTER_PROPERTIES)
+                .with_additional(["id"])
+                .with_limit(page_size)
             )
+            if fetched and self._cursor_supported:
+                query = query.with_after(cursor)
+            elif fetched:
+                query = query.with_offset(fetched)
             
             result = query.do()
+            if result and result.get("errors"):
+                if cursor is not None and self._cursor_supported and "after" in str(result["errors"]):
+                    # Both paging styles list objects in id order, so continue at the same position
+                    logger.warning("Weaviate doesn't support the cursor API, paging shelters with offsets instead")
+                    self._cursor_supported = False
+                    continue
+                raise RuntimeError(f"Weaviate query failed: {result['errors']}")
+            
+            page = ((result or {}).get("data") or {}).get("Get", {}).get(SHELTER_CLASS_NAME) or []
+            yield from self._parse_shelters(result)
+            
+            fetched += len(page)
+            if len(page) < page_size:
+                return
+            cursor = page[-1]["_additional"]["id"]
+    
+    def query_shelters_within(self, lat: float, lon: float, distance_km: float) -> List[Dict[str, Any]]:
+        """
+        Query the shelters within a radius using Weaviate's geo filter, so only
+        matching shelters are transferred. Unlike get_shelters_by_location this
+        always asks Weaviate and never touches the shelter cache, which suits
+        scripts and checks of the geo index.
+        
+        Args:
+            lat: Latitude of the location
+            lon: Longitude of the location
+            distance_km: Search radius in kilometers
             
-            # Process results
-            shelters = []
-            if result and "data" in result and "Get" in result["data"] and SHELTER_CLASS_NAME in result["data"]["Get"]:
-                weaviate_shelters = result["data"]["Get"][SHELTER_CLASS_NAME]
-                
-                for shelter in weaviate_shelters:
-                    # Convert from Weaviate format to our API format
-                    location = shelter.get("location", {})
-                    shelters.append({
-                        "hotelname": shelter.get("hotelName", ""),
-                        "address": shelter.get("address", ""),
-                        "bookinglink": shelter.get("bookingLink", ""),
-                        "lat": location.get("latitude", 0),
-                        "lon": location.get("longitude", 0),
-                        "phonenumber": shelter.get("phoneNumber", ""),
-                        "notes": shelter.get("notes", "")
-                    })
+        Returns:
+            List of shelter objects with distance_km, sorted by distance
             
-            logger.info(f"Retrieved {len(shelters)} shelters")
-            return shelters
+        Raises:
+            RuntimeError: If Weaviate reports an error for a page
+        """
+        where_filter = {
+            "operator": "WithinGeoRange",
+            "path": ["location"],
+            "valueGeoRange": {
+                "geoCoordinates": {"latitude": lat, "longitude": lon},
+                "distance": {"max": distance_km * 1000}  # Weaviate measures in meters
+            }
+        }
+        
+        # Weaviate doesn't return geo matches in distance order, so a capped result
+        # would be an arbitrary subset; page with offset (the cursor API can't be
+        # combined with a filter) until a short page
+        shelters = []
+        offset = 0
+        while True:
+            result = (
+                self.client.query
+                .get(SHELTER_CLASS_NAME, SHELTER_PROPERTIES)
+                .with_where(where_filter)
+                .with_limit(SHELTER_PAGE_SIZE)
+                .with_offset(offset)
+                .do()
+            )
+            if result and result.get("errors"):
+                raise RuntimeError(f"Weaviate query failed: {result['errors']}")
             
-        except Exception as e:
-            logger.error(f"Failed to query all shelters: {str(e)}")
-            return []
+            page = self._parse_shelters(result)
+            shelters.extend(page)
             
+            if len(page) < SHELTER_PAGE_SIZE:
+                break
+            offset += SHELTER_PAGE_SIZE
+        
+        # Distances are only needed for the (small) matching set, to sort and report them
+        for shelter in shelters:
+            shelter['distance_km'] = round(self._haversine(lat, lon, shelter['lat'], shelter['lon']), 2)
+        shelters.sort(key=lambda x: x['distance_km'])
+        
+        logger.info(f"Found {len(shelters)} shelters within {distance_km}km using Weaviate's geo filter")
+        return shelters
+    
+    def _parse_shelters(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Convert a Weaviate Get result for the shelter class to our API format"""
+        shelters = []
+        if result and "data" in result and "Get" in result["data"] and SHELTER_CLASS_NAME in result["data"]["Get"]:
+            weaviate_shelters = result["data"]["Get"][SHELTER_CLASS_NAME]
+            
+            for shelter in weaviate_shelters:
+                # Convert from Weaviate format to our API format
+                location = shelter.get("location", {})
+                shelters.append({
+                    "hotelname": shelter.get("hotelName", ""),
+                    "address": shelter.get("address", ""),
+                    "bookinglink": shelter.get("bookingLink", ""),
+                    "lat": location.get("latitude", 0),
+                    "lon": location.get("longitude", 0),
+                    "phonenumber": shelter.get("phoneNumber", ""),
+                    "notes": shelter.get("notes", "")
+                })
+        
+        return shelters
+    
+# Global service instance, shared so the shelter cache survives between requests
+_shelter_service = None
+
 # Helper function to initialize the service (for use in the API)
 def get_shelter_service() -> ShelterService:
     """
-    Get or create a shelter service instance
+    Get or create the shelter service instance
     
     Returns:
         ShelterService instance
     """
+    global _shelter_service
+    
+    if _shelter_service is not None:
+        return _shelter_service
+    
     try:
         service = ShelterService()
         # Create schema if it doesn't exist
         service.create_schema()
+        _shelter_service = service
         return service
     except Exception as e:
         logger.error(f"Failed to initialize shelter service: {str(e)}")
         # Return a non-functional service instance as a fallback
-        return ShelterService(weaviate_url=None) 
\ No newline at end of file
+        return ShelterService(weaviate_url=None)
@@ -6,19 +6,47 @@ Test script for Mapbox geocoding functionality
 import os
 import requests
 import json
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pprint import pprint
 
-def geocode_address(address):
-    """Test geocoding an address using Mapbox API"""
+# Number of addresses geocoded at once
+MAX_CONCURRENT_REQUESTS = 8
+
+# Mapbox responses are kept on disk between runs so repeated runs don't use up the API quota
+CACHE_FILE = os.path.join(os.getenv("GEOCODING_CACHE_DIR", "geocoding_cache"), "test_geocoding")
+
+# One keep-alive session shared by all lookups
+_session = requests.Session()
+
+# Keeps the output of concurrent lookups (and access to the shelve file) from interleaving
+_print_lock = threading.Lock()
+_cache_lock = threading.Lock()
+
+def normalize_address(address):
+    """Normalize an address so e.g. "LAX Airport " and "lax airport" share a cache entry"""
+    return address.strip().lower()
+
+@lru_cache(maxsize=4096)
+def fetch_geocoding_data(normalized_address, mapbox_token):
+    """
+    Fetch the Mapbox response for a normalized address, from the on-disk cache if present.
+    Raises requests.HTTPError for error responses, which are not cached.
+    """
+    with _cache_lock:
+        try:
+            with shelve.open(CACHE_FILE) as cache:
+                data = cache.get(normalized_address)
+        except OSError:
+            data = None
     
-    # Get Mapbox API key from environment
-    mapbox_token = os.getenv("MAPBOX_ACCESS_TOKEN")
-    if not mapbox_token:
-        print("ERROR: MAPBOX_ACCESS_TOKEN environment variable not set")
-        return None
+    if data is not None:
+        return data
     
     # URL encode the address
-    encoded_address = requests.utils.quote(address)
+    encoded_address = requests.utils.quote(normalized_address)
     
     # Construct Mapbox Geocoding API URL
     url = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{encoded_address}.json"
@@ -28,30 +56,54 @@ def geocode_address(address):
         "country": "US"
     }
     
-    print(f"Geocoding address: {address}")
-    print(f"API URL: {url}")
-    
     # Make request to Mapbox
-    response = requests.get(url, params=params)
-    
-    # Check response
-    if response.status_code != 200:
-        print(f"ERROR: Mapbox API returned status code {response.status_code}")
-        print(response.text)
-        return None
-    
-    # Parse response
+    response = _session.get(url, params=params, timeout=10)
+    response.raise_for_status()
     data = response.json()
     
-    # Pretty print the full response for inspection
-    print("\nFull Mapbox Response:")
-    pprint(data)
+    with _cache_lock:
+        try:
+            os.makedirs(os.path.dirname(CACHE_FILE) or ".", exist_ok=True)
+            with shelve.open(CACHE_FILE) as cache:
+                cache[normalized_address] = data
+        except OSError as e:
+            print(f"WARNING: Could not write geocoding cache: {e}")
     
-    # Check if we got features back
-    if not data.get("features") or len(data["features"]) == 0:
-        print(f"WARNING: No geocoding results found for address: {address}")
+    return data
+
+def geocode_address(address):
+    """Test geocoding an address using Mapbox API"""
+    
+    # Get Mapbox API key from environment
+    mapbox_token = os.getenv("MAPBOX_ACCESS_TOKEN")
+    if not mapbox_token:
+        print("ERROR: MAPBOX_ACCESS_TOKEN environment variable not set")
         return None
     
+    try:
+        data = fetch_geocoding_data(normalize_address(address), mapbox_token)
+        error = None
+    except requests.HTTPError as e:
+        data, error = None, e.response
+    
+    with _print_lock:
+        print(f"Geocoding address: {address}")
+        
+        # Check response
+        if error is not None:
+            print(f"ERROR: Mapbox API returned status code {error.status_code}")
+            print(error.text)
+            return None
+        
+        # Pretty print the full response for inspection
+        print("\nFull Mapbox Response:")
+        pprint(data)
+        
+        # Check if we got features back
+        if not data.get("features") or len(data["features"]) == 0:
+            print(f"WARNING: No geocoding results found for address: {address}")
+            return None
+    
     # Get coordinates [longitude, latitude]
     coordinates = data["features"][0]["center"]
     
@@ -71,13 +123,15 @@ def test_addresses():
         "LAX Airport"
     ]
     
-    for address in test_cases:
+    # Geocode all addresses concurrently over one keep-alive session, so the run takes
+    # about as long as the slowest lookup rather than the sum of all of them
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        results = list(executor.map(geocode_address, test_cases))
+    
+    for address, result in zip(test_cases, results):
         print("\n" + "="*50)
         print(f"Testing address: {address}")
         
-        # Geocode the address
-        result = geocode_address(address)
-        
         if result:
             lat, lon = result
             print(f"SUCCESS: Geocoded to coordinates: ({lat}, {lon})")
@@ -0,0 +1,52 @@
+"""
+Numba-compiled kernels for the numeric hot paths.
+
+Importing this module requires numba, which is optional. Callers should import
+it lazily and fall back to their NumPy implementation on ImportError.
+"""
+import math
+import numpy as np
+from numba import njit
+
+# Constants are float32 so the whole kernel stays in single precision; mixing in
+# float64 literals would promote every operation to double
+EARTH_DIAMETER_KM = np.float32(2 * 6371.0)
+HALF = np.float32(0.5)
+ONE = np.float32(1.0)
+
+# The explicit signature compiles at import (or loads from the on-disk cache),
+# so the first request doesn't pay for JIT compilation
+# NaN coordinates must stay NaN, so fastmath skips the no-NaN/no-inf assumptions
+@njit('f4[::1](f4, f4, f4[::1], f4[::1], f4[::1])', fastmath={'contract', 'afn', 'reassoc'}, cache=True)
+def haversine_km(lat0, lon0, lats, lons, cos_lats):
+    """
+    Great circle distance from one point to many, fused into a single loop
+    without NumPy's temporary arrays. Works in float32, which is accurate to
+    well under a meter at these scales and packs twice as many values per SIMD lane.
+    
+    Args:
+        lat0: Latitude of the origin, in radians
+        lon0: Longitude of the origin, in radians
+        lats: Latitudes of the points, in radians
+        lons: Longitudes of the points, in radians
+        cos_lats: Precomputed cosines of lats
+        
+    Returns:
+        Array of distances in kilometers
+    """
+    n = lats.shape[0]
+    distances = np.empty(n, dtype=np.float32)
+    cos_lat0 = math.cos(lat0)
+    
+    for i in range(n):
+        sin_dlat = math.sin((lats[i] - lat0) * HALF)
+        sin_dlon = math.sin((lons[i] - lon0) * HALF)
+        a = sin_dlat * sin_dlat + cos_lat0 * cos_lats[i] * sin_dlon * sin_dlon
+        # Rounding can push a just past 1 for antipodal points; a comparison
+        # rather than min() so NaN passes through
+        root = math.sqrt(a)
+        if root > ONE:
+            root = ONE
+        distances[i] = EARTH_DIAMETER_KM * math.asin(root)
+    
+    return distances
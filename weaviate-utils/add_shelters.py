@@ -3,14 +3,15 @@
 Script to load shelter data from geocoded.csv into Weaviate.
 
 Usage:
-  python add_shelters.py [--no-sample-query]
+  python add_shelters.py [--no-sample-query] [--workers N]
 
 Options:
   --no-sample-query  Skip running the sample query after import
+  --workers N        Number of batch requests to keep in flight (default: 4)
 """
 
 import csv
-import json
+import orjson
 import logging
 import sys
 import os
@@ -20,6 +21,12 @@ import argparse
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from shelter_service import get_shelter_service
 
+# pandas is optional; without it the CSV is parsed row by row with the csv module
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,12 +38,15 @@ logger = logging.getLogger('add_csv_shelters')
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_FILE = os.path.join(SCRIPT_DIR, 'geocoded.csv')
 
+# Concurrent batch requests; Weaviate's insert rate is the real limit beyond a handful
+DEFAULT_WORKERS = 4
+
 # Global variable to store the first shelter for sample query
 first_shelter = None
 
 def load_shelters_from_csv(csv_file):
     """
-    Load shelter data from a CSV file
+    Load shelter data from a CSV file, with pandas if it is installed
     
     Args:
         csv_file: Path to the CSV file
@@ -45,74 +55,119 @@ def load_shelters_from_csv(csv_file):
         List of shelter dictionaries
     """
     global first_shelter
-    shelters = []
-    skipped_rows = 0
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            row_count = 0
-            for row in reader:
-                row_count += 1
-                
-                # Handle misaligned CSV data
-                # The actual format appears to be:
-                # address, bookinglink, phonenumber (in lat column), latitude (in lon column), 
-                # longitude (in phonenumber column), notes (in notes column)
-                try:
-                    # Extract latitude and longitude from misaligned columns
-                    latitude_str = row.get("lon", "").strip()
-                    longitude_str = row.get("phonenumber", "").strip()
-                    
-                    # Skip if either coordinate is missing
-                    if not latitude_str or not longitude_str:
-                        logger.warning(f"Skipping row {row_count}: Missing coordinates")
-                        skipped_rows += 1
-                        continue
-                    
-                    # Try to convert to float
-                    lat = float(latitude_str)
-                    lon = float(longitude_str)
-                    
-                    # Create the shelter object with correct field mapping
-                    # The hotelname is not in the CSV, so we'll use the address as hotelname
-                    shelter = {
-                        "hotelname": row.get("address", "").strip(),
-                        "address": row.get("address", "").strip(),
-                        "bookinglink": row.get("bookinglink", "").strip(),
-                        "lat": lat,
-                        "lon": lon,
-                        "phonenumber": row.get("lat", "").strip(),  # phonenumber is in lat column
-                        "notes": row.get("notes", "").strip()
-                    }
-                    
-                    # Store first valid row for sample query
-                    if first_shelter is None:
-                        first_shelter = shelter.copy()
-                    
-                    shelters.append(shelter)
-                    
-                except ValueError:
-                    logger.warning(f"Skipping row {row_count}: Invalid coordinates format")
-                    skipped_rows += 1
-                    continue
-                
-            logger.info(f"Loaded {len(shelters)} shelters from CSV (skipped {skipped_rows} rows with invalid coordinates)")
-            return shelters
-            
+        if pd is not None:
+            shelters, skipped_rows = _load_with_pandas(csv_file)
+        else:
+            shelters, skipped_rows = _load_with_csv_reader(csv_file)
+        
+        # Store first valid row for sample query
+        if first_shelter is None and shelters:
+            first_shelter = shelters[0].copy()
+        
+        logger.info(f"Loaded {len(shelters)} shelters from CSV (skipped {skipped_rows} rows with invalid coordinates)")
+        return shelters
+        
     except Exception as e:
         logger.error(f"Error loading CSV file: {str(e)}")
         return []
 
-def main():
-    """Load shelters from CSV and add them to Weaviate"""
+def _load_with_pandas(csv_file):
+    """Parse the CSV in C and convert the coordinate columns in one vectorized step"""
+    # Read through a text-mode file so newlines inside quoted fields are normalized
+    # like the csv module does. Rows have a trailing comma, so read exactly the six
+    # header columns; otherwise pandas uses the first column as the index.
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        df = pd.read_csv(f, dtype=str, keep_default_na=False, usecols=range(6))
     
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(description='Import shelters from CSV into Weaviate')
-    parser.add_argument('--no-sample-query', action='store_true', help='Skip running the sample query after import')
-    args = parser.parse_args()
+    # Handle misaligned CSV data: latitude is in the lon column and longitude
+    # in the phonenumber column (see _load_with_csv_reader)
+    lat = pd.to_numeric(df["lon"].str.strip(), errors="coerce")
+    lon = pd.to_numeric(df["phonenumber"].str.strip(), errors="coerce")
+    valid = lat.notna() & lon.notna()
+    
+    skipped_rows = int((~valid).sum())
+    if skipped_rows:
+        skipped_row_numbers = (valid[~valid].index + 1).tolist()
+        logger.warning(f"Skipping rows {skipped_row_numbers}: Missing or invalid coordinates")
+    
+    df = df[valid]
+    address = df["address"].str.strip()
+    shelters = pd.DataFrame({
+        "hotelname": address,
+        "address": address,
+        "bookinglink": df["bookinglink"].str.strip(),
+        "lat": lat[valid],
+        "lon": lon[valid],
+        "phonenumber": df["lat"].str.strip(),  # phonenumber is in lat column
+        "notes": df["notes"].str.strip()
+    }).to_dict(orient="records")
+    
+    return shelters, skipped_rows
+
+def _load_with_csv_reader(csv_file):
+    """Parse the CSV row by row with the standard library"""
+    shelters = []
+    append = shelters.append
+    skipped_rows = 0
     
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        
+        # Handle misaligned CSV data
+        # The actual format appears to be:
+        # address, bookinglink, phonenumber (in lat column), latitude (in lon column), 
+        # longitude (in phonenumber column), notes (in notes column)
+        for row_count, row in enumerate(reader, 1):
+            get = row.get
+            
+            # Extract latitude and longitude from misaligned columns; float() ignores
+            # surrounding whitespace so the strings don't need stripping first
+            latitude_str = get("lon")
+            longitude_str = get("phonenumber")
+            
+            # Skip if either coordinate is missing
+            if not latitude_str or not longitude_str or latitude_str.isspace() or longitude_str.isspace():
+                logger.warning(f"Skipping row {row_count}: Missing coordinates")
+                skipped_rows += 1
+                continue
+            
+            # Convert before building anything, so bad rows cost nothing more
+            try:
+                lat = float(latitude_str)
+                lon = float(longitude_str)
+            except ValueError:
+                logger.warning(f"Skipping row {row_count}: Invalid coordinates format")
+                skipped_rows += 1
+                continue
+            
+            # Create the shelter object with correct field mapping
+            # The hotelname is not in the CSV, so we'll use the address as hotelname
+            address = (get("address") or "").strip()
+            append({
+                "hotelname": address,
+                "address": address,
+                "bookinglink": (get("bookinglink") or "").strip(),
+                "lat": lat,
+                "lon": lon,
+                "phonenumber": (get("lat") or "").strip(),  # phonenumber is in lat column
+                "notes": (get("notes") or "").strip()
+            })
+    
+    return shelters, skipped_rows
+
+def run(no_sample_query=False, workers=DEFAULT_WORKERS):
+    """
+    Load shelters from CSV and add them to Weaviate
+    
+    Args:
+        no_sample_query: Skip running the sample query after import
+        workers: Number of batch requests to keep in flight
+        
+    Returns:
+        Boolean indicating that every shelter was imported
+    """
     try:
         # Initialize shelter service
         logger.info("Initializing shelter service...")
@@ -123,7 +178,7 @@ def main():
         schema_created = shelter_service.create_schema()
         if not schema_created:
             logger.error("Failed to create schema. Exiting.")
-            return
+            return False
             
         # Load shelters from CSV
         logger.info(f"Loading shelters from {CSV_FILE}...")
@@ -131,15 +186,15 @@ def main():
         
         if not shelters:
             logger.error("No valid shelters loaded from CSV. Exiting.")
-            return
+            return False
             
-        # Add shelters to Weaviate
-        logger.info(f"Adding {len(shelters)} shelters to Weaviate...")
+        # Add shelters to Weaviate in batches, several requests at a time
+        logger.info(f"Adding {len(shelters)} shelters to Weaviate with {workers} workers...")
+        shelter_ids = shelter_service.add_shelters_batch(shelters, num_workers=max(1, workers))
         successful_imports = 0
         failed_imports = 0
         
-        for i, shelter in enumerate(shelters):
-            shelter_id = shelter_service.add_shelter(shelter)
+        for i, (shelter, shelter_id) in enumerate(zip(shelters, shelter_ids)):
             if shelter_id:
                 successful_imports += 1
                 if i < 5:  # Log only the first 5 for brevity
@@ -152,23 +207,39 @@ def main():
         logger.info(f"Import summary: {successful_imports} successful, {failed_imports} failed")
         
         # Run a sample query using the first shelter's coordinates
-        if not args.no_sample_query and first_shelter is not None:
+        if not no_sample_query and first_shelter is not None:
             logger.info("\n--- Sample Query ---")
             lat = first_shelter["lat"]
             lon = first_shelter["lon"]
             
             logger.info(f"Querying shelters near coordinates: ({lat}, {lon})")
-            nearby_shelters = shelter_service.get_shelters_by_location(lat, lon, distance_km=10.0)
+            # Geo-filtered in Weaviate; get_shelters_by_location would start loading every
+            # shelter into the cache in a background thread that outlives this script
+            nearby_shelters = shelter_service.query_shelters_within(lat, lon, distance_km=10.0)
             
             logger.info(f"Found {len(nearby_shelters)} nearby shelters")
             
             # Display the first result
             if nearby_shelters:
                 logger.info("First result:")
-                logger.info(json.dumps(nearby_shelters[0], indent=2))
+                logger.info(orjson.dumps(nearby_shelters[0], option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode())
+        
+        return failed_imports == 0
         
     except Exception as e:
         logger.error(f"Error adding shelters: {str(e)}")
+        return False
+
+def main():
+    """Parse command line arguments and run the import"""
+    parser = argparse.ArgumentParser(description='Import shelters from CSV into Weaviate')
+    parser.add_argument('--no-sample-query', action='store_true', help='Skip running the sample query after import')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of batch requests to keep in flight')
+    args = parser.parse_args()
+    
+    # Exit non-zero on failure so shell scripts and CI can tell
+    if not run(no_sample_query=args.no_sample_query, workers=args.workers):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
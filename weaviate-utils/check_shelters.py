@@ -2,17 +2,24 @@
 """
 Script to check if shelters are correctly loaded and accessible in Weaviate.
 This script prints all shelter coordinates and tests geospatial queries.
+
+Usage:
+  python check_shelters.py [--server-side]
+
+Options:
+  --server-side  Run the radius checks as Weaviate geo queries instead of locally
 """
 
-import json
 import logging
 import sys
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 # Add parent directory to path so we can import from it
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from shelter_service import get_shelter_service
+from shelter_service import get_shelter_service, SHELTER_CLASS_NAME
 
 # Configure logging
 logging.basicConfig(
@@ -21,48 +28,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger('check_shelters')
 
-def check_shelters():
-    """Check if shelters are properly loaded and accessible in Weaviate"""
+# Radii for the geospatial checks, in kilometers
+TEST_RADII_KM = [1, 5, 10, 20, 50]
+
+def count_within_server_side(shelter_service, lat, lon, radii):
+    """
+    Count the shelters within each radius using Weaviate's geo filter, with all
+    queries in flight at once so the total wait is about that of the slowest one
+    
+    Returns:
+        List of counts, in the same order as radii
+    """
+    def count(radius):
+        return len(shelter_service.query_shelters_within(lat, lon, radius))
+    
+    with ThreadPoolExecutor(max_workers=len(radii)) as executor:
+        return list(executor.map(count, radii))
+
+def check_shelters(server_side=False):
+    """
+    Check if shelters are properly loaded and accessible in Weaviate
+    
+    Args:
+        server_side: Exercise Weaviate's geo index for the radius checks instead of
+            computing distances locally
+    """
+    
+    # Imported here, like the client in ShelterService, so loading this module stays cheap
+    from weaviate.exceptions import UnexpectedStatusCodeException
     
     try:
         # Initialize shelter service
         logger.info("Initializing shelter service connection...")
         shelter_service = get_shelter_service()
         
-        # Get all shelters
+        # Get all shelters, in columnar form for the vectorized checks below
         logger.info("Fetching all shelters...")
-        all_shelters = shelter_service.get_all_shelters()
+        shelters = shelter_service.get_shelter_table()
         
-        if not all_shelters:
+        if len(shelters) == 0:
             logger.error("No shelters found in Weaviate. Please run add_shelters.py first.")
             return
             
-        logger.info(f"Found {len(all_shelters)} total shelters")
+        logger.info(f"Found {len(shelters)} total shelters")
         
-        # Print first 5 shelters
-        logger.info("First 5 shelters:")
-        for i, shelter in enumerate(all_shelters[:5], 1):
-            logger.info(f"Shelter #{i}:")
-            logger.info(f"  Name: {shelter.get('hotelname', 'N/A')}")
-            logger.info(f"  Address: {shelter.get('address', 'N/A')}")
-            logger.info(f"  Coordinates: ({shelter.get('lat', 'N/A')}, {shelter.get('lon', 'N/A')})")
-            logger.info("")
+        # Print first 5 shelters as a single log record
+        lines = ["First 5 shelters:"]
+        # Read the columns directly rather than building a dict per shelter
+        for i, (name, address, lat, lon) in enumerate(zip(
+                shelters.hotel_names[:5], shelters.addresses[:5],
+                shelters.lats[:5].tolist(), shelters.lons[:5].tolist()), 1):
+            lines.append(f"Shelter #{i}:")
+            lines.append(f"  Name: {name}")
+            lines.append(f"  Address: {address}")
+            lines.append(f"  Coordinates: ({lat}, {lon})")
+            lines.append("")
+        logger.info("\n".join(lines))
         
-        # Count coordinates
-        valid_coords = 0
-        zero_coords = 0
-        null_coords = 0
+        # Classify coordinates with one mask per bucket; missing values are NaN in the table
+        null_mask = np.isnan(shelters.lats) | np.isnan(shelters.lons)
+        zero_mask = ~null_mask & (shelters.lats == 0) & (shelters.lons == 0)
+        valid_mask = ~(null_mask | zero_mask)
         
-        for shelter in all_shelters:
-            lat = shelter.get('lat')
-            lon = shelter.get('lon')
-            
-            if lat is None or lon is None:
-                null_coords += 1
-            elif lat == 0 and lon == 0:
-                zero_coords += 1
-            else:
-                valid_coords += 1
+        null_coords = int(null_mask.sum())
+        zero_coords = int(zero_mask.sum())
+        valid_coords = int(valid_mask.sum())
         
         logger.info(f"Coordinate Statistics:")
         logger.info(f"  Valid Coordinates: {valid_coords}")
@@ -71,26 +101,34 @@ def check_shelters():
         
         # Test geospatial queries with known coordinates
         if valid_coords > 0:
-            # Find a shelter with valid coordinates
-            test_shelter = next((s for s in all_shelters if s.get('lat') and s.get('lon')), None)
-            if test_shelter:
-                lat = test_shelter.get('lat')
-                lon = test_shelter.get('lon')
-                logger.info(f"\nTesting geospatial query near ({lat}, {lon})...")
-                
-                # Test with different radiuses
-                for radius in [1, 5, 10, 20, 50]:
-                    nearby = shelter_service.get_shelters_by_location(lat, lon, distance_km=radius)
-                    logger.info(f"Found {len(nearby)} shelters within {radius}km")
+            # Use the first shelter with valid coordinates; argmax stops at the first True.
+            # Only (0,0) is invalid, a single zero coordinate is a real location.
+            test_shelter = shelters.row(int(valid_mask.argmax()))
+            lat = test_shelter['lat']
+            lon = test_shelter['lon']
+            logger.info(f"\nTesting geospatial query near ({lat}, {lon})...")
+            
+            if server_side:
+                counts = count_within_server_side(shelter_service, lat, lon, TEST_RADII_KM)
             else:
-                logger.warning("Couldn't find a shelter with valid coordinates for testing")
+                # Distances are computed once; on the sorted distances, the number of shelters
+                # within each radius is its insertion point, so all radii are counted together
+                radii = np.array(TEST_RADII_KM, dtype=np.float32)
+                counts = np.searchsorted(np.sort(shelters.distances_from(lat, lon)), radii, side='right').tolist()
+            
+            for radius, count in zip(TEST_RADII_KM, counts):
+                logger.info(f"Found {count} shelters within {radius}km")
+        else:
+            logger.warning("Couldn't find a shelter with valid coordinates for testing")
         
         logger.info("\nChecking Weaviate schema...")
-        schema = shelter_service.client.schema.get()
-        logger.info(f"Available classes: {[c['class'] for c in schema.get('classes', [])]}")
+        # Fetch just the shelter class instead of the whole cluster schema; Weaviate
+        # answers 404 if it doesn't exist
+        try:
+            shelter_class = shelter_service.client.schema.get(SHELTER_CLASS_NAME)
+        except UnexpectedStatusCodeException:
+            shelter_class = None
         
-        # Check if the Shelter class exists and has the location property
-        shelter_class = next((c for c in schema.get('classes', []) if c['class'] == 'Shelter'), None)
         if shelter_class:
             logger.info("Shelter class found in schema")
             location_prop = next((p for p in shelter_class.get('properties', []) if p['name'] == 'location'), None)
@@ -106,6 +144,10 @@ def check_shelters():
         logger.exception("Stack trace:")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check shelters loaded into Weaviate')
+    parser.add_argument('--server-side', action='store_true', help='Run the radius checks as Weaviate geo queries instead of locally')
+    args = parser.parse_args()
+    
     logger.info("SHELTER DATA CHECK")
     logger.info("==================")
-    check_shelters() 
\ No newline at end of file
+    check_shelters(server_side=args.server_side) 
\ No newline at end of file
@@ -4,7 +4,7 @@ Script to demonstrate querying shelters from Weaviate.
 This script shows various query examples.
 """
 
-import json
+import orjson
 import logging
 import sys
 import os
@@ -20,20 +20,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger('query_shelters')
 
+# The field layout is fixed, so the whole block is one template filled in per shelter
+_RULE = "-" * 80
+_SHELTER_TEMPLATE = (
+    "\n{prefix}{title}\n"
+    f"{_RULE}\n"
+    "Address: {address}\n"
+    "Phone: {phone}\n"
+    "Booking Link: {booking}\n"
+    "Location: ({lat}, {lon})\n"
+    "{notes_line}"
+    f"{_RULE}"
+)
+
 def display_shelter(shelter, index=None):
     """Format and display a shelter nicely"""
     prefix = f"Shelter #{index}: " if index is not None else "Shelter: "
+    notes = shelter.get('notes')
     
-    print(f"\n{prefix}{shelter.get('hotelname', shelter.get('address', 'Unknown'))}")
-    print("-" * 80)
-    print(f"Address: {shelter.get('address', 'N/A')}")
-    print(f"Phone: {shelter.get('phonenumber', 'N/A')}")
-    print(f"Booking Link: {shelter.get('bookinglink', 'N/A')}")
-    print(f"Location: ({shelter.get('lat', 'N/A')}, {shelter.get('lon', 'N/A')})")
-    
-    if shelter.get('notes'):
-        print(f"Notes: {shelter.get('notes')}")
-    print("-" * 80)
+    print(_SHELTER_TEMPLATE.format(
+        prefix=prefix,
+        title=shelter.get('hotelname', shelter.get('address', 'Unknown')),
+        address=shelter.get('address', 'N/A'),
+        phone=shelter.get('phonenumber', 'N/A'),
+        booking=shelter.get('bookinglink', 'N/A'),
+        lat=shelter.get('lat', 'N/A'),
+        lon=shelter.get('lon', 'N/A'),
+        notes_line=f"Notes: {notes}\n" if notes else ""
+    ))
 
 def main():
     """Run example queries against Weaviate"""
@@ -45,32 +59,28 @@ def main():
         
         print("\n===== SHELTER QUERY EXAMPLES =====\n")
         
-        # Example 1: Get all shelters
-        print("\n1. GETTING ALL SHELTERS")
-        all_shelters = shelter_service.get_all_shelters()
+        # Example 1: Get a single shelter, without pulling the whole class over the wire
+        print("\n1. GETTING A SHELTER")
+        reference_shelter = shelter_service.get_one_shelter()
         
-        if not all_shelters:
+        if not reference_shelter:
             print("No shelters found. Please run add_sample_shelters.py first.")
             return
             
-        print(f"Found {len(all_shelters)} total shelters")
-        
-        # Show first 3 shelters
-        for i, shelter in enumerate(all_shelters[:3], 1):
-            display_shelter(shelter, i)
+        display_shelter(reference_shelter, 1)
             
-        # Example 2: Geospatial query using the first shelter's coordinates
+        # Example 2: Geospatial query using that shelter's coordinates
         print("\n2. NEARBY SHELTER SEARCH (GEOSPATIAL)")
         
-        # Use the first shelter as our reference point
-        reference_shelter = all_shelters[0]
+        # Use the shelter as our reference point
         lat = reference_shelter["lat"]
         lon = reference_shelter["lon"]
         
         print(f"Searching for shelters near ({lat}, {lon})...")
         
-        # Query for nearby shelters (10km radius)
-        nearby_shelters = shelter_service.get_shelters_by_location(lat, lon, distance_km=10.0)
+        # Query for nearby shelters (10km radius) with Weaviate's geo filter, so only
+        # nearby shelters are transferred and no cache warm-up is started
+        nearby_shelters = shelter_service.query_shelters_within(lat, lon, distance_km=10.0)
         
         print(f"Found {len(nearby_shelters)} shelters within 10km")
         
@@ -79,10 +89,8 @@ def main():
             display_shelter(shelter, i)
             
         # Example 3: Raw JSON format (useful for API responses)
-        print("\n3. JSON FORMAT EXAMPLE (FIRST SHELTER)")
-        
-        if all_shelters:
-            print(json.dumps(all_shelters[0], indent=2))
+        print("\n3. JSON FORMAT EXAMPLE (REFERENCE SHELTER)")
+        print(orjson.dumps(reference_shelter, option=orjson.OPT_INDENT_2).decode())
         
     except Exception as e:
         logger.error(f"Error querying shelters: {str(e)}")
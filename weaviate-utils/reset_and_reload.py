@@ -6,11 +6,11 @@ Script to reset Weaviate schema and reload the shelter data with corrected field
 import logging
 import os
 import sys
-import weaviate
 
 # Add parent directory to path so we can import from it
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from shelter_service import get_shelter_service, SHELTER_CLASS_NAME
+from http_client import get_session
+from shelter_service import SHELTER_CLASS_NAME, WEAVIATE_URL
 
 # Configure logging
 logging.basicConfig(
@@ -22,24 +22,18 @@ logger = logging.getLogger('reset_and_reload')
 def reset_weaviate_schema():
     """Reset the Weaviate schema by deleting the shelter class"""
     try:
-        # Get the Weaviate URL
-        weaviate_url = os.getenv("WEAVIATE_URL", "http://localhost:8080")
-        logger.info(f"Connecting to Weaviate at {weaviate_url}")
+        logger.info(f"Using Weaviate at {WEAVIATE_URL}")
         
-        # Connect to Weaviate
-        client = weaviate.Client(weaviate_url)
+        # A single REST call; the Weaviate client would first fetch server metadata on
+        # connect. Weaviate answers 200 whether or not the class existed.
+        logger.info(f"Deleting existing {SHELTER_CLASS_NAME} class...")
+        response = get_session().delete(f"{WEAVIATE_URL}/v1/schema/{SHELTER_CLASS_NAME}", timeout=30)
         
-        # Check if the shelter class exists
-        schema = client.schema.get()
-        classes = [c['class'] for c in schema.get('classes', [])]
-        
-        if SHELTER_CLASS_NAME in classes:
-            logger.info(f"Deleting existing {SHELTER_CLASS_NAME} class...")
-            client.schema.delete_class(SHELTER_CLASS_NAME)
-            logger.info(f"Successfully deleted {SHELTER_CLASS_NAME} class")
-        else:
-            logger.info(f"{SHELTER_CLASS_NAME} class not found, nothing to delete")
+        if response.status_code != 200:
+            logger.error(f"Weaviate error deleting {SHELTER_CLASS_NAME} class: {response.status_code} - {response.text}")
+            return False
         
+        logger.info(f"Successfully deleted {SHELTER_CLASS_NAME} class (if it existed)")
         logger.info("Schema reset complete")
         return True
         
@@ -48,20 +42,33 @@ def reset_weaviate_schema():
         return False
 
 def main():
-    """Reset Weaviate schema and reload data"""
+    """
+    Reset Weaviate schema and reload data
+    
+    Returns:
+        Boolean indicating success
+    """
     logger.info("Starting reset and reload process")
     
     # Step 1: Reset the schema
     if not reset_weaviate_schema():
         logger.error("Failed to reset schema, exiting")
-        return
+        return False
     
-    # Step 2: Import the shelters with corrected field mappings
+    # Step 2: Import the shelters with corrected field mappings, in this process.
+    # The shelter service is first created by the import, after the class was
+    # deleted, so it recreates the schema.
     logger.info("Importing shelters from CSV with corrected field mappings...")
-    os.system("python add_shelters.py --no-sample-query")
+    from add_shelters import run as run_add_shelters  # Loads pandas, so only import it once needed
+    if not run_add_shelters(no_sample_query=True):
+        logger.error("Failed to reload shelters")
+        return False
     
     logger.info("Reset and reload process complete")
     logger.info("You can now verify the data using: curl -X GET http://127.0.0.1:6000/api/debug/shelters")
+    return True
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # Exit non-zero on failure so shell scripts and CI can tell
+    if not main():
+        sys.exit(1) 
\ No newline at end of file